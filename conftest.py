@@ -1,9 +1,24 @@
+import os
 import pytest
 import json
 import allure
-from utils.webdriver_utils import WebDriverFactory
+import functools
+from utils.webdriver_utils import WebDriverFactory, DriverBinaryResolver
+from utils.browser_pool import BrowserPool
+from utils.profile_utils import ProfileTemplate
+from utils.context_utils import BrowserContextManager
+from utils.browser_daemon import BrowserDaemon
+from utils.schedule_utils import (
+    DurationStore, DurationRecorder, DurationScheduling, duration_db_path, resource_groups
+)
 from utils.db_utils import db_utils
+from utils.account_utils import ForumAccount, AccountPool
+from utils.cleanup_utils import DatabaseCleanup
 from utils.mail_utils import email_utils
+from utils.session_utils import LoginSessionCache
+from utils.api_utils import ForumApiClient, ForumState
+from utils.screenshot_utils import ScreenshotService, screenshot_service
+from page_objects.base_page import BasePage
 from page_objects.home_page import HomePage
 from page_objects.register_page import RegisterPage
 from page_objects.login_page import LoginPage
@@ -11,6 +26,7 @@ from page_objects.post_page import PostPage
 from page_objects.thread_page import ThreadPage
 from page_objects.user_page import UserPage
 from page_objects.message_page import MessagePage
+from data_generators.forum_data_generator import THREAD_ID
 
 # 读取测试数据
 @pytest.fixture(scope="session")
@@ -20,10 +36,10 @@ def register_test_data():
         return json.load(f)
 
 @pytest.fixture(scope="session")
-def forum_test_data():
-    """读取论坛功能测试数据"""
+def forum_test_data(forum_account):
+    """读取论坛功能测试数据，目标用户和帖子替换为当前账号专用的用户和帖子"""
     with open("data/forum_test_data.json", encoding="utf-8") as f:
-        return json.load(f)
+        return forum_account.apply_to(json.load(f))
 
 # WebDriver相关fixtures
 @pytest.fixture(scope="session")
@@ -36,34 +52,84 @@ def headless(request):
     """获取是否使用无头模式，默认为False"""
     return request.config.getoption("--headless", default=False)
 
+@pytest.fixture(scope="session")
+def browser_daemon(request):
+    """使用--browser-daemon时返回常驻浏览器，否则返回None"""
+    if request.config.getoption("--browser-daemon"):
+        return BrowserDaemon()
+    return None
+
+@pytest.fixture(scope="session")
+def browser_pool(browser_name, headless, browser_daemon, request):
+    """每个worker进程内共享的浏览器池"""
+    pool = BrowserPool(
+        browser_name,
+        headless,
+        max_uses=request.config.getoption("--browser-max-uses"),
+        daemon=browser_daemon
+    )
+    yield pool
+    pool.close()
+
 @pytest.fixture(scope="function")
 def driver(browser_name, headless, request):
-    """创建WebDriver实例"""
-    driver = WebDriverFactory.create_driver(browser_name, headless)
+    """创建WebDriver实例
+
+    默认从浏览器池中借出浏览器，使用--browser-isolation=function时每个测试独立启动浏览器，
+    使用--browser-daemon时始终借出常驻浏览器
+    """
+    isolation = request.config.getoption("--browser-isolation")
+    if request.config.getoption("--browser-daemon"):
+        isolation = "pool"
+    if isolation == "function":
+        driver = WebDriverFactory.create_driver(browser_name, headless)
+    else:
+        pool = request.getfixturevalue("browser_pool")
+        driver = pool.acquire()
     
     # 设置窗口大小
     # driver.maximize_window()
     
-    # 将driver添加到allure报告
-    allure.attach(
-        driver.get_screenshot_as_png(),
-        name="启动浏览器",
-        attachment_type=allure.attachment_type.PNG
-    )
+    # 将driver添加到allure报告，仅在always截图策略下截图
+    screenshot = screenshot_service.capture(driver, f"{request.node.name}_启动浏览器")
+    if screenshot:
+        allure.attach(
+            screenshot,
+            name="启动浏览器",
+            attachment_type=allure.attachment_type.PNG
+        )
     
     # 返回driver实例
     yield driver
     
     # 捕获测试失败的截图
-    if request.node.rep_call.failed:
-        allure.attach(
-            driver.get_screenshot_as_png(),
-            name="测试失败截图",
-            attachment_type=allure.attachment_type.PNG
-        )
+    rep_call = getattr(request.node, "rep_call", None)
+    if rep_call is not None and rep_call.failed:
+        screenshot = screenshot_service.capture(driver, f"{request.node.name}_测试失败", on_failure=True)
+        if screenshot:
+            allure.attach(
+                screenshot,
+                name="测试失败截图",
+                attachment_type=allure.attachment_type.PNG
+            )
     
-    # 关闭driver
-    WebDriverFactory.quit_driver(driver)
+    # 关闭driver或归还到浏览器池
+    if isolation == "function":
+        WebDriverFactory.quit_driver(driver)
+    else:
+        pool.release(driver)
+
+# 多会话fixture
+@pytest.fixture(scope="function")
+def browser_contexts(driver, browser_name, headless):
+    """在当前浏览器中创建多个相互隔离的会话，用于多用户场景
+
+    用法：session = browser_contexts.new_session(login_session=peer_login_session)
+         session.page(UserPage).open_user_page(...)
+    """
+    manager = BrowserContextManager(driver, browser_name, headless)
+    yield manager
+    manager.close()
 
 # 添加测试结果处理
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
@@ -116,20 +182,119 @@ def database():
     db_utils.close()
 
 # 登录用户fixture
+TEST_USERNAME = "test01"
+TEST_PASSWORD = "test01"
+
+def ui_login(driver, username=TEST_USERNAME, password=TEST_PASSWORD):
+    """通过登录页面登录，并确认登录成功"""
+    LoginPage(driver).open_login_page().login(username, password)
+    assert HomePage(driver).is_logged_in(), f"用户{username}登录失败"
+
+def check_logged_in(driver):
+    """打开主页检查是否处于登录状态"""
+    return HomePage(driver).open_home().is_logged_in()
+
+def use_worker_accounts(config):
+    """是否为每个xdist worker创建独立的测试账号，auto时仅在并行运行中创建"""
+    mode = config.getoption("--test-accounts")
+    if mode == "auto":
+        return hasattr(config, "workerinput")
+    return mode == "worker"
+
+@pytest.fixture(scope="session")
+def forum_account(database, request):
+    """论坛测试使用的账号
+
+    每个worker独立账号时，由test01复制出登录账号和目标用户，并复制一个目标帖子，会话结束时批量删除；
+    否则所有测试共用test01和测试数据中的目标用户、帖子
+    """
+    if not use_worker_accounts(request.config):
+        yield ForumAccount(TEST_USERNAME, TEST_PASSWORD)
+        return
+    pool = AccountPool(database, TEST_USERNAME, TEST_PASSWORD, THREAD_ID)
+    try:
+        yield pool.provision(os.environ.get("PYTEST_XDIST_WORKER", "gw0"))
+    finally:
+        pool.release()
+
+@pytest.fixture(scope="session")
+def forum_user_id(database, forum_account):
+    """当前测试账号的用户ID"""
+    return forum_account.user_id or database.get_user_id(username=forum_account.username)
+
+@pytest.fixture(scope="session")
+def persistence_check(request):
+    """评论、私信是否成功的校验方式: db、ui 或 both"""
+    return request.config.getoption("--persistence-check")
+
+@pytest.fixture(scope="session")
+def login_session(browser_daemon, forum_account, request):
+    """每个worker共享的登录会话缓存，使用常驻浏览器时跨多次运行保存"""
+    cache = LoginSessionCache(
+        login=functools.partial(ui_login, username=forum_account.username, password=forum_account.password),
+        is_logged_in=check_logged_in,
+        check_interval=request.config.getoption("--login-check-interval")
+    )
+    if browser_daemon is not None:
+        browser_daemon.restore_login(cache)
+    yield cache
+    if browser_daemon is not None:
+        browser_daemon.save_login(cache)
+
+@pytest.fixture(scope="session")
+def peer_account(database, forum_account):
+    """多用户场景中的第二个账号
+
+    每个worker独立账号时使用当前账号的目标用户(与当前账号密码相同)；
+    共享账号时目标用户的密码未知，由test01复制出一个临时账号，会话结束时删除
+    """
+    if forum_account.target_username is not None:
+        yield ForumAccount(
+            forum_account.target_username,
+            forum_account.password,
+            user_id=forum_account.target_user_id,
+            nickname=forum_account.target_nickname
+        )
+        return
+    pool = AccountPool(database, TEST_USERNAME, TEST_PASSWORD, THREAD_ID)
+    try:
+        yield pool.provision(f"{os.environ.get('PYTEST_XDIST_WORKER', 'gw0')}p")
+    finally:
+        pool.release()
+
+@pytest.fixture(scope="session")
+def peer_login_session(peer_account, request):
+    """第二个账号的登录会话缓存，通过browser_contexts.new_session(login_session=...)注入新会话"""
+    return LoginSessionCache(
+        login=functools.partial(ui_login, username=peer_account.username, password=peer_account.password),
+        is_logged_in=check_logged_in,
+        check_interval=request.config.getoption("--login-check-interval")
+    )
+
 @pytest.fixture(scope="function")
-def logged_in_user(login_page, home_page):
-    """创建一个已登录的用户会话"""
-    login_page.open_login_page()
-    login_page.login("test01", "test01")  # 使用测试用户名和密码
-    
-    # 确认登录成功
-    assert home_page.is_logged_in()
-    
+def logged_in_user(driver, login_session):
+    """创建一个已登录的用户会话
+
+    首次使用时通过UI登录，之后直接向浏览器注入缓存的cookies和localStorage。
+    浏览器归还到池中时会清理登录状态，因此无需再通过UI退出登录。
+    """
+    login_session.apply(driver)
     yield
-    
-    # 退出登录
-    home_page.open_home()
-    home_page.click_logout()
+
+# 论坛API fixtures
+@pytest.fixture(scope="session")
+def forum_api(forum_account):
+    """已登录测试账号的论坛API客户端"""
+    client = ForumApiClient().login(forum_account.username, forum_account.password)
+    yield client
+    client.close()
+
+@pytest.fixture(scope="function")
+def forum_state(forum_api):
+    """通过API设置关注、屏蔽、点赞等前置状态，测试结束后恢复"""
+    state = ForumState(forum_api)
+    yield state
+    state.restore()
 
 # 测试完成后发送Allure报告
 @pytest.fixture(scope="session", autouse=True)
@@ -139,9 +304,152 @@ def send_report_after_tests(request):
     if request.config.getoption("--send-report", default=False):
         email_utils.send_allure_report()
 
+# 根据命令行选项初始化全局配置
+def pytest_configure(config):
+    """根据命令行选项配置测试环境"""
+    if config.getoption("--offline-drivers"):
+        DriverBinaryResolver.offline = True
+    if config.getoption("--browser-daemon") and getattr(config.option, "numprocesses", None):
+        raise pytest.UsageError("--browser-daemon只有一个常驻浏览器，不能与-n同时使用")
+    if config.getoption("--browser-daemon") and config.getoption("--test-accounts") == "worker":
+        raise pytest.UsageError("--browser-daemon保存的是test01的登录状态，不能与--test-accounts=worker同时使用")
+    if config.getoption("--db-cleanup") == "module":
+        if getattr(config.option, "numprocesses", None):
+            raise pytest.UsageError("--db-cleanup=module会删除其他worker同时创建的数据，并行运行时请使用session")
+        if config.getoption("--test-accounts") == "worker":
+            raise pytest.UsageError("--db-cleanup=module会在第一个模块结束时删除会话级的测试账号，不能与--test-accounts=worker同时使用")
+    WebDriverFactory.profile = config.getoption("--browser-profile")
+    WebDriverFactory.extra_blocked_urls = config.getoption("--block-url") or []
+    WebDriverFactory.page_load_strategy = config.getoption("--page-load-strategy")
+    WebDriverFactory.network_monitor = config.getoption("--network-monitor")
+    BasePage.navigation_mode = config.getoption("--navigation-mode")
+    if config.getoption("--warm-profile"):
+        WebDriverFactory.profile_template = ProfileTemplate(config.getoption("--browser"))
+        if not hasattr(config, "workerinput"):
+            # 主进程删除上次会话的模板，本次会话由第一个启动浏览器的worker重新预热
+            WebDriverFactory.profile_template.reset()
+    screenshot_service.configure(
+        policy=config.getoption("--screenshot-policy"),
+        output_dir=config.getoption("--screenshot-dir"),
+        image_format=config.getoption("--screenshot-format"),
+        scale=config.getoption("--screenshot-scale")
+    )
+
+    config.addinivalue_line(
+        "markers",
+        "resource(*names): 声明测试修改的论坛资源(如user:2、thread:2，ID取自测试数据)，使用共享账号并行运行时"
+        "使用相同资源的测试不会同时执行；仅在--xdist-scheduler=duration或--dist loadgroup下生效，"
+        "每个worker使用独立账号时不分组"
+    )
+    if getattr(config, "workerinput", {}).get("forumtest_resource_groups"):
+        # worker把xdist_group组名追加到nodeid，调度器据此把同组测试分配给同一worker
+        config.option.loadgroup = True
+
+    if not hasattr(config, "workerinput"):
+        # 记录测试耗时，供下次并行运行时调度使用
+        config.pluginmanager.register(
+            DurationRecorder(DurationStore(duration_db_path(config))), "forumtest_duration_recorder"
+        )
+
+    # 并行运行时worker记录水位，由主进程在所有worker结束后统一清理测试数据
+    if config.getoption("--db-cleanup") != "off":
+        config.pluginmanager.register(
+            DatabaseCleanup(db_utils, config.getoption("--db-cleanup")), "forumtest_db_cleanup"
+        )
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
+    """声明了相同资源的测试加入同一个xdist_group，并行运行时在同一worker中依次执行
+
+    资源ID取自测试数据中共享的目标用户和帖子；每个worker使用独立账号时，测试数据被替换为
+    各worker专用的用户和帖子，标记中的ID不再对应实际使用的资源，也没有需要串行的共享资源，不分组
+    """
+    if use_worker_accounts(config):
+        return
+    resources = {
+        item.nodeid: {name for mark in item.iter_markers("resource") for name in mark.args}
+        for item in items
+    }
+    groups = resource_groups(resources)
+    for item in items:
+        if item.nodeid in groups:
+            item.add_marker(pytest.mark.xdist_group(groups[item.nodeid]))
+
+def use_duration_scheduler(config):
+    """是否使用按历史耗时调度的DurationScheduling"""
+    return config.getoption("--xdist-scheduler") == "duration" and config.getoption("dist") in ("load", "loadgroup")
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """通知worker按资源分组，worker重新解析命令行参数，不会继承主进程修改过的配置
+
+    每个worker使用独立账号时测试之间不再共享论坛资源，无需分组
+    """
+    if use_duration_scheduler(node.config) and node.config.getoption("--test-accounts") == "shared":
+        node.workerinput["forumtest_resource_groups"] = True
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    """使用-n并行运行时按历史耗时调度测试，耗时长的测试优先分配"""
+    if not use_duration_scheduler(config):
+        return None
+    durations = DurationStore(duration_db_path(config)).load()
+    return DurationScheduling(config, log, durations)
+
+def pytest_unconfigure(config):
+    """等待后台截图写入完成"""
+    screenshot_service.shutdown()
+
 # 注册命令行选项
 def pytest_addoption(parser):
     """添加命令行选项"""
     parser.addoption("--browser", action="store", default="chrome", help="指定浏览器: chrome 或 firefox")
     parser.addoption("--headless", action="store_true", default=False, help="是否使用无头模式")
-    parser.addoption("--send-report", action="store_true", default=False, help="是否发送Allure报告") 
\ No newline at end of file
+    parser.addoption("--send-report", action="store_true", default=False, help="是否发送Allure报告")
+    parser.addoption("--browser-isolation", action="store", default="pool", choices=["pool", "function"],
+                     help="浏览器隔离方式: pool(复用浏览器池) 或 function(每个测试独立启动浏览器)")
+    parser.addoption("--browser-max-uses", action="store", type=int, default=20,
+                     help="浏览器池中单个浏览器最多复用的测试数，超过后重建")
+    parser.addoption("--browser-profile", action="store", default="fast",
+                     choices=list(WebDriverFactory.PROFILES),
+                     help="浏览器配置: fast(屏蔽图片、字体和统计脚本并关闭动画) 或 realistic(浏览器默认行为，用于性能测试)")
+    parser.addoption("--block-url", action="append", default=[],
+                     help="额外屏蔽的URL模式(支持*通配符)，可多次指定，仅Chrome生效")
+    parser.addoption("--page-load-strategy", action="store", default="eager",
+                     choices=["normal", "eager", "none"],
+                     help="页面加载策略，eager和none不等待子资源加载，由页面对象等待前端应用就绪")
+    parser.addoption("--network-monitor", action="store", default="auto", choices=["auto", "cdp", "hook"],
+                     help="等待网络空闲的方式: cdp(读取Chrome的performance日志)、hook(在页面中包装fetch/XHR) "
+                          "或 auto(realistic配置下使用hook，不开启performance日志，其他配置使用cdp)")
+    parser.addoption("--navigation-mode", action="store", default="full", choices=["full", "spa"],
+                     help="页面跳转方式: full(每次完整加载页面) 或 spa(已在论坛页面时通过前端路由跳转)")
+    parser.addoption("--warm-profile", action="store_true", default=False,
+                     help="使用预热的浏览器配置模板，每个浏览器复制一份，静态资源直接从磁盘缓存读取")
+    parser.addoption("--browser-daemon", action="store_true", default=False,
+                     help="连接到python -m utils.browser_daemon start启动的常驻浏览器，不启动新浏览器")
+    parser.addoption("--xdist-scheduler", action="store", default="duration", choices=["duration", "default"],
+                     help="并行调度方式: duration(按.pytest_cache中记录的历史耗时，长测试优先，并按resource标记分组) "
+                          "或 default(xdist默认的load调度，不按resource标记分组，需要分组时使用--dist loadgroup)")
+    parser.addoption("--offline-drivers", action="store_true", default=False,
+                     help="离线模式：不访问网络，只使用环境变量、本地清单或PATH中的浏览器驱动")
+    parser.addoption("--test-accounts", action="store", default="auto", choices=["auto", "shared", "worker"],
+                     help="论坛测试账号: worker(每个worker从test01复制独立账号、目标用户和帖子)、shared(共用test01) "
+                          "或 auto(并行运行时为worker，否则为shared)")
+    parser.addoption("--db-cleanup", action="store", default="session", choices=["session", "module", "off"],
+                     help="测试数据自动清理: session(会话结束后删除本次运行新增的用户、帖子和私信)、"
+                          "module(每个测试模块结束后删除，仅限串行运行) 或 off")
+    parser.addoption("--persistence-check", action="store", default="both", choices=["db", "ui", "both"],
+                     help="评论、私信的校验方式: both(数据库和页面都检查)、db(只轮询数据库确认已写入，不等待页面渲染，"
+                          "需确认库中内容与输入原文一致) 或 ui(只检查页面显示)")
+    parser.addoption("--login-check-interval", action="store", type=int, default=300,
+                     help="登录会话缓存的校验间隔(秒)，校验失败时重新通过UI登录")
+    parser.addoption("--screenshot-policy", action="store", default="on-failure",
+                     choices=ScreenshotService.POLICIES,
+                     help="截图策略: never、on-failure(仅测试失败时) 或 always")
+    parser.addoption("--screenshot-dir", action="store", default="screenshots",
+                     help="截图保存目录，按xdist worker分子目录")
+    parser.addoption("--screenshot-format", action="store", default="png",
+                     choices=ScreenshotService.FORMATS,
+                     help="截图保存格式，jpeg/webp需要安装Pillow")
+    parser.addoption("--screenshot-scale", action="store", type=float, default=1.0,
+                     help="截图缩放比例，小于1时缩小保存，需要安装Pillow")
@@ -1,29 +1,404 @@
+import time
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
-import time
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, JavascriptException
+from utils.webdriver_utils import WebDriverFactory
+from utils.screenshot_utils import screenshot_service
+from utils.network_utils import NetworkMonitor
 
 class BasePage:
     """基础页面类，包含所有页面共有的方法"""
 
     TOAST = (By.CSS_SELECTOR, '#dzq-toast-root > div > span')
+    # 论坛后端接口地址
+    API_PATTERN = r"/apiv3/"
+    
+    # 记录所有toast的脚本，toast文本和出现时间写入window.__dzqToasts，可重复执行。
+    # 每次toast节点插入页面都记录一条，连续出现两条相同文本的toast也不会合并；
+    # 已显示的toast节点文本变化时再记录一条
+    TOAST_CAPTURE_SCRIPT = """
+        (function () {
+            if (window.__dzqToasts) {
+                return;
+            }
+            window.__dzqToasts = [];
+            window.__dzqToastCursor = 0;
+            const selector = '#dzq-toast-root > div > span';
+            const push = function (span) {
+                const text = span.textContent.trim();
+                if (!text) {
+                    return;
+                }
+                span.__dzqToastText = text;
+                window.__dzqToasts.push({
+                    text: text,
+                    time: performance.timeOrigin + performance.now()
+                });
+            };
+            const pushChanged = function () {
+                document.querySelectorAll(selector).forEach(function (span) {
+                    if (span.__dzqToastText !== span.textContent.trim()) {
+                        push(span);
+                    }
+                });
+            };
+            new MutationObserver(function (mutations) {
+                mutations.forEach(function (mutation) {
+                    mutation.addedNodes.forEach(function (node) {
+                        if (node.nodeType !== Node.ELEMENT_NODE) {
+                            return;
+                        }
+                        if (node.matches(selector)) {
+                            push(node);
+                        }
+                        node.querySelectorAll(selector).forEach(push);
+                    });
+                });
+                pushChanged();
+            }).observe(document, {
+                childList: true,
+                subtree: true,
+                characterData: true
+            });
+            pushChanged();
+        })();
+    """
+    # 在页面内等待未读取的toast，参数依次为预期文本、超时毫秒数和回调
+    TOAST_WAIT_SCRIPT = """
+        const expected = arguments[0];
+        const timeoutMs = arguments[1];
+        const done = arguments[arguments.length - 1];
+        const start = Date.now();
+        const poll = function () {
+            const toasts = window.__dzqToasts;
+            for (let i = window.__dzqToastCursor; i < toasts.length; i++) {
+                if (expected === null || toasts[i].text.indexOf(expected) !== -1) {
+                    window.__dzqToastCursor = i + 1;
+                    return done({matched: true, toast: toasts[i]});
+                }
+            }
+            if (Date.now() - start >= timeoutMs) {
+                const last = toasts.length > window.__dzqToastCursor ? toasts[toasts.length - 1] : null;
+                window.__dzqToastCursor = toasts.length;
+                return done({matched: false, toast: last});
+            }
+            setTimeout(poll, 20);
+        };
+        poll();
+    """
+    
+    # 查找所有匹配的元素并提取文本、属性和class，参数依次为定位方式、定位表达式、属性列表和文本子元素选择器
+    EXTRACT_ELEMENTS_SCRIPT = """
+        const by = arguments[0];
+        const value = arguments[1];
+        const attributes = arguments[2];
+        const textSelector = arguments[3];
+        let elements = [];
+        if (by === 'xpath') {
+            const result = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (let i = 0; i < result.snapshotLength; i++) {
+                elements.push(result.snapshotItem(i));
+            }
+        } else {
+            elements = Array.from(document.querySelectorAll(value));
+        }
+        return elements.map(function (element) {
+            const textElement = textSelector ? element.querySelector(textSelector) : element;
+            const attrs = {};
+            attributes.forEach(function (name) {
+                attrs[name] = element.getAttribute(name);
+            });
+            return {
+                text: textElement ? textElement.innerText.trim() : null,
+                attributes: attrs,
+                classes: Array.from(element.classList)
+            };
+        });
+    """
+    
+    # 通过MutationObserver等待元素状态变化，参数依次为定位方式、定位表达式、条件、预期值、
+    # 文本子元素选择器、超时毫秒数和回调。条件有has_class、no_class、text_is、text_not和count_above
+    TRANSITION_WAIT_SCRIPT = """
+        const by = arguments[0];
+        const value = arguments[1];
+        const condition = arguments[2];
+        const expected = arguments[3];
+        const textSelector = arguments[4];
+        const timeoutMs = arguments[5];
+        const done = arguments[arguments.length - 1];
+        const start = performance.now();
+        const query = function () {
+            if (by === 'xpath') {
+                const result = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+                const elements = [];
+                for (let i = 0; i < result.snapshotLength; i++) {
+                    elements.push(result.snapshotItem(i));
+                }
+                return elements;
+            }
+            return Array.from(document.querySelectorAll(value));
+        };
+        const check = function () {
+            const elements = query();
+            if (condition === 'count_above') {
+                return elements.length > expected;
+            }
+            const element = elements[0];
+            if (!element) {
+                return false;
+            }
+            if (condition === 'has_class') {
+                return element.classList.contains(expected);
+            }
+            if (condition === 'no_class') {
+                return !element.classList.contains(expected);
+            }
+            const textElement = textSelector ? element.querySelector(textSelector) : element;
+            const text = textElement ? textElement.innerText.trim() : null;
+            return condition === 'text_is' ? text === expected : text !== null && text !== expected;
+        };
+        let finished = false;
+        let observer = null;
+        let timer = null;
+        const finish = function (ok) {
+            if (finished) {
+                return;
+            }
+            finished = true;
+            if (observer) {
+                observer.disconnect();
+            }
+            clearTimeout(timer);
+            done({ok: ok, elapsed: performance.now() - start});
+        };
+        if (check()) {
+            return finish(true);
+        }
+        observer = new MutationObserver(function () {
+            if (check()) {
+                finish(true);
+            }
+        });
+        observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+        timer = setTimeout(function () {
+            finish(check());
+        }, timeoutMs);
+    """
+    
+    # 等待Next.js前端应用就绪：#__next已完成React hydration且路由不在切换中，参数依次为超时毫秒数和回调。
+    # 导航前旧页面会被标记为__dzqStale，避免在新页面加载前误判为就绪
+    APP_READY_SCRIPT = """
+        const timeoutMs = arguments[0];
+        const done = arguments[arguments.length - 1];
+        const start = performance.now();
+        const hasKey = function (node, prefix) {
+            return Object.keys(node).some(function (key) {
+                return key.indexOf(prefix) === 0;
+            });
+        };
+        const isReady = function () {
+            if (window.__dzqStale || document.readyState === 'loading') {
+                return false;
+            }
+            const root = document.getElementById('__next');
+            if (!root || !root.firstElementChild) {
+                return false;
+            }
+            const hydrated = '_reactRootContainer' in root
+                || hasKey(root, '__reactContainer')
+                || hasKey(root.firstElementChild, '__reactFiber')
+                || hasKey(root.firstElementChild, '__reactInternalInstance');
+            if (!hydrated) {
+                return false;
+            }
+            const router = window.next && window.next.router;
+            if (router) {
+                if (!router.__dzqTracked && router.events) {
+                    router.__dzqTracked = true;
+                    router.events.on('routeChangeStart', function () {
+                        window.__dzqRouteChanging = true;
+                    });
+                    ['routeChangeComplete', 'routeChangeError'].forEach(function (name) {
+                        router.events.on(name, function () {
+                            window.__dzqRouteChanging = false;
+                        });
+                    });
+                }
+                if (router.isReady === false || window.__dzqRouteChanging) {
+                    return false;
+                }
+            }
+            return true;
+        };
+        const poll = function () {
+            if (isReady()) {
+                return done({ready: true, elapsed: performance.now() - start});
+            }
+            if (performance.now() - start >= timeoutMs) {
+                return done({ready: false, elapsed: performance.now() - start});
+            }
+            setTimeout(poll, 20);
+        };
+        poll();
+    """
+    
+    # 通过Next.js路由在应用内跳转，参数依次为路径、站点origin、超时毫秒数和回调。
+    # 不在论坛站点或路由不可用时返回routed=false，由调用方改用driver.get
+    SPA_NAVIGATE_SCRIPT = """
+        const path = arguments[0];
+        const origin = arguments[1];
+        const timeoutMs = arguments[2];
+        const done = arguments[arguments.length - 1];
+        const router = window.next && window.next.router;
+        if (location.origin !== origin || !router || window.__dzqStale) {
+            return done({routed: false});
+        }
+        let finished = false;
+        const finish = function (routed) {
+            if (!finished) {
+                finished = true;
+                clearTimeout(timer);
+                done({routed: routed});
+            }
+        };
+        const timer = setTimeout(function () {
+            finish(false);
+        }, timeoutMs);
+        try {
+            router.push(path).then(function (success) {
+                finish(success !== false);
+            }, function () {
+                finish(false);
+            });
+        } catch (error) {
+            finish(false);
+        }
+    """
+    
+    # 快速填充文本：输入框通过原生value setter赋值并派发React可识别的input/change事件，
+    # contenteditable编辑器通过insertText命令整体插入，参数依次为元素和文本
+    FAST_FILL_SCRIPT = """
+        const element = arguments[0];
+        const text = arguments[1];
+        element.focus();
+        if (element.isContentEditable) {
+            const selection = window.getSelection();
+            const range = document.createRange();
+            range.selectNodeContents(element);
+            selection.removeAllRanges();
+            selection.addRange(range);
+            if (!document.execCommand('insertText', false, text)) {
+                element.textContent = text;
+                element.dispatchEvent(new InputEvent('input', {bubbles: true, inputType: 'insertText', data: text}));
+            }
+        } else {
+            const prototype = element instanceof HTMLTextAreaElement
+                ? HTMLTextAreaElement.prototype
+                : HTMLInputElement.prototype;
+            Object.getOwnPropertyDescriptor(prototype, 'value').set.call(element, text);
+            element.dispatchEvent(new Event('input', {bubbles: true}));
+        }
+        element.dispatchEvent(new Event('change', {bubbles: true}));
+    """
+    
+    # 读取输入框的value或contenteditable编辑器的文本，参数为元素
+    INPUT_VALUE_SCRIPT = """
+        const element = arguments[0];
+        return element.isContentEditable ? element.textContent : element.value;
+    """
+    
+    # 文本长度超过该值时默认使用快速填充
+    FAST_FILL_THRESHOLD = 200
+    # 按定位器指定输入方式："keys"逐键输入，"fast"快速填充；未指定时按文本长度自动选择
+    INPUT_MODES = {}
+    
+    # 每次页面加载时注入的脚本
+    INIT_SCRIPTS = [TOAST_CAPTURE_SCRIPT]
+    
+    # 页面跳转方式：full每次通过driver.get完整加载，spa已在论坛页面时通过前端路由跳转，
+    # 由pytest_configure根据命令行选项设置
+    navigation_mode = "full"
     
     def __init__(self, driver):
         self.driver = driver
         self.base_url = "https://localhost"
         self.timeout = 10
+        # 显式等待的轮询间隔，浏览器隐式等待已关闭，所有等待都由BasePage负责
+        self.poll_frequency = 0.1
+        WebDriverFactory.install_init_scripts(driver, self.INIT_SCRIPTS)
+        self.network = NetworkMonitor.for_driver(driver)
     
     def open(self, url=""):
-        """打开页面"""
-        self.driver.get(f"{self.base_url}/{url}")
+        """打开页面
+        
+        spa跳转方式下，浏览器已在论坛页面时通过前端路由跳转，否则完整加载页面。
+        使用eager或none页面加载策略时，driver.get不等待所有子资源加载完成，
+        改为等待前端应用完成hydration后再返回。
+        """
+        if self.navigation_mode == "spa" and self.navigate_in_app(url):
+            return
+        if WebDriverFactory.page_load_strategy == "normal":
+            self.driver.get(f"{self.base_url}/{url}")
+        else:
+            if WebDriverFactory.page_load_strategy == "none":
+                # none策略下driver.get立即返回，标记旧页面，避免就绪检查读到旧页面的状态
+                self.driver.execute_script("window.__dzqStale = true;")
+            self.driver.get(f"{self.base_url}/{url}")
+            self.wait_for_app_ready()
+        WebDriverFactory.run_init_scripts(self.driver)
     
-    def find_element(self, locator, timeout=None):
-        """查找元素"""
+    def navigate_in_app(self, url, timeout=None):
+        """通过Next.js路由在应用内跳转，不重新加载页面
+        
+        Returns:
+            bool: 是否跳转成功，浏览器不在论坛页面、路由不可用或跳转超时时返回False
+        """
+        if timeout is None:
+            timeout = self.timeout
+        result = self.driver.execute_async_script(
+            self.SPA_NAVIGATE_SCRIPT, f"/{url}", self.base_url, int(timeout * 1000)
+        )
+        return result["routed"]
+    
+    def wait_for_app_ready(self, timeout=None):
+        """等待#__next完成hydration且路由空闲
+        
+        Returns:
+            float: 等待耗时(秒)
+            
+        Raises:
+            TimeoutException: 超时后应用仍未就绪
+        """
+        if timeout is None:
+            timeout = self.timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        while True:
+            remaining = max(deadline - time.monotonic(), 0)
+            try:
+                result = self.driver.execute_async_script(self.APP_READY_SCRIPT, int(remaining * 1000))
+                break
+            except JavascriptException as e:
+                # 页面加载策略为none时driver.get立即返回，导航提交时执行脚本的旧文档被卸载，在新文档中重试
+                if "unloaded" not in str(e).lower():
+                    raise
+                if time.monotonic() >= deadline:
+                    raise TimeoutException(f"页面未在{timeout}秒内就绪：{self.driver.current_url}") from e
+        if not result["ready"]:
+            raise TimeoutException(f"页面未在{timeout}秒内就绪：{self.driver.current_url}")
+        return time.monotonic() - start
+    
+    def wait(self, timeout=None):
+        """创建显式等待，timeout为None时使用默认超时时间，为0时只检查一次"""
         if timeout is None:
             timeout = self.timeout
+        return WebDriverWait(self.driver, timeout, poll_frequency=self.poll_frequency)
+    
+    def find_element(self, locator, timeout=None):
+        """查找元素"""
         try:
-            return WebDriverWait(self.driver, timeout).until(
+            return self.wait(timeout).until(
                 EC.presence_of_element_located(locator)
             )
         except TimeoutException:
@@ -31,30 +406,148 @@ class BasePage:
     
     def find_elements(self, locator, timeout=None):
         """查找多个元素"""
-        if timeout is None:
-            timeout = self.timeout
         try:
-            return WebDriverWait(self.driver, timeout).until(
+            return self.wait(timeout).until(
                 EC.presence_of_all_elements_located(locator)
             )
         except TimeoutException:
             return []
     
+    @staticmethod
+    def _to_script_locator(locator):
+        """将定位器转换为脚本可用的xpath或css选择器"""
+        by, value = locator
+        if by == By.XPATH:
+            return ("xpath", value)
+        if by == By.ID:
+            return ("css", f'[id="{value}"]')
+        if by == By.NAME:
+            return ("css", f'[name="{value}"]')
+        if by == By.CLASS_NAME:
+            return ("css", f".{value}")
+        if by == By.TAG_NAME:
+            return ("css", value)
+        if by == By.CSS_SELECTOR:
+            return ("css", value)
+        raise ValueError(f"不支持批量提取的定位方式: {by}")
+    
+    def extract_elements(self, locator, attributes=(), text_selector=None, timeout=None):
+        """一次脚本调用提取所有匹配元素的文本、属性和class
+        
+        Args:
+            locator: 元素定位器
+            attributes: 需要读取的属性名列表
+            text_selector: 读取文本的子元素选择器，为None时读取元素自身的文本
+            timeout: 等待元素出现的超时时间，为0时只查询一次
+            
+        Returns:
+            list: 每个元素为{"text": 文本, "attributes": {属性名: 值}, "classes": [class列表]}，
+                  超时未找到元素时返回空列表
+        """
+        by, value = self._to_script_locator(locator)
+        args = (self.EXTRACT_ELEMENTS_SCRIPT, by, value, list(attributes), text_selector)
+        try:
+            return self.wait(timeout).until(lambda driver: driver.execute_script(*args))
+        except TimeoutException:
+            return []
+    
+    def extract_element(self, locator, attributes=(), text_selector=None, timeout=None):
+        """提取第一个匹配元素的文本、属性和class，找不到元素时抛出NoSuchElementException"""
+        elements = self.extract_elements(locator, attributes, text_selector, timeout)
+        if not elements:
+            raise NoSuchElementException(f"找不到元素：{locator}")
+        return elements[0]
+    
+    def exists_now(self, locator):
+        """立即判断元素是否存在，不做任何等待"""
+        return len(self.driver.find_elements(*locator)) > 0
+    
+    def wait_for_any(self, locators, timeout=None):
+        """等待多个元素中的任意一个出现，用作页面已渲染的标志
+        
+        页面在两种状态下分别显示不同的元素时(如已登录显示用户菜单、未登录显示登录按钮)，
+        先等待任一元素出现，再用exists_now判断状态，不必为不存在的元素等满超时时间
+        
+        Returns:
+            tuple: 第一个出现的定位器，超时时返回None
+        """
+        try:
+            return self.wait(timeout).until(
+                lambda driver: next((locator for locator in locators if driver.find_elements(*locator)), False)
+            )
+        except TimeoutException:
+            return None
+    
+    def wait_for_data_loaded(self, timeout=None):
+        """等待页面的后端接口请求全部完成，之后可以用timeout=0读取可能为空的列表
+        
+        超时时不抛出异常，由调用方读取当前已渲染的内容
+        """
+        try:
+            self.wait_for_network_idle(self.API_PATTERN, timeout=timeout)
+        except TimeoutException:
+            pass
+    
+    def assert_absent(self, locator, timeout=0):
+        """断言元素不存在
+
+        Args:
+            locator: 元素定位器
+            timeout: 等待元素消失的最长时间，默认为0即只检查一次
+        """
+        if timeout == 0:
+            assert not self.exists_now(locator), f"元素仍然存在：{locator}"
+            return
+        try:
+            self.wait(timeout).until_not(EC.presence_of_element_located(locator))
+        except TimeoutException:
+            raise AssertionError(f"元素仍然存在：{locator}")
+    
     def click(self, locator, timeout=None):
         """点击元素"""
         element = self.find_element(locator, timeout)
         element.click()
         return element
     
-    def input_text(self, locator, text, timeout=None):
-        """输入文本"""
+    def input_text(self, locator, text, timeout=None, mode=None):
+        """输入文本
+        
+        Args:
+            locator: 元素定位器
+            text: 输入的文本
+            timeout: 等待元素出现的超时时间
+            mode: 输入方式，"keys"逐键输入，"fast"快速填充；为None时先查INPUT_MODES，
+                  未配置的定位器在文本长度超过FAST_FILL_THRESHOLD时使用快速填充。
+                  快速填充不受maxlength限制，测试长度限制时应指定"keys"
+        """
         element = self.find_element(locator, timeout)
-        element.clear()
-        element.send_keys(text)
+        if mode is None:
+            mode = self.INPUT_MODES.get(locator)
+        if mode is None:
+            mode = "fast" if len(text) > self.FAST_FILL_THRESHOLD else "keys"
+        
+        if mode == "fast" and text:
+            # 最后一个字符通过真实按键输入，确保编辑器的键盘事件处理也被触发
+            self.driver.execute_script(self.FAST_FILL_SCRIPT, element, text[:-1])
+            element.send_keys(text[-1])
+        else:
+            element.clear()
+            element.send_keys(text)
         return element
     
+    def get_input_value(self, locator, timeout=None):
+        """读取输入框或contenteditable编辑器中的文本
+        
+        快速填充直接写入value，不受maxlength和编辑器按键处理的长度限制，
+        测试超长输入时可以用它确认实际写入的内容
+        """
+        element = self.find_element(locator, timeout)
+        return self.driver.execute_script(self.INPUT_VALUE_SCRIPT, element)
+    
     def is_element_present(self, locator, timeout=None):
         """判断元素是否存在"""
+        if timeout == 0:
+            return self.exists_now(locator)
         try:
             self.find_element(locator, timeout)
             return True
@@ -67,10 +560,8 @@ class BasePage:
     
     def wait_for_element_to_be_clickable(self, locator, timeout=None):
         """等待元素可点击"""
-        if timeout is None:
-            timeout = self.timeout
         try:
-            return WebDriverWait(self.driver, timeout).until(
+            return self.wait(timeout).until(
                 EC.element_to_be_clickable(locator)
             )
         except TimeoutException:
@@ -78,74 +569,79 @@ class BasePage:
     
     def wait_for_url_contains(self, url_part, timeout=None):
         """等待URL包含特定字符串"""
-        if timeout is None:
-            timeout = self.timeout
         try:
-            return WebDriverWait(self.driver, timeout).until(
+            return self.wait(timeout).until(
                 EC.url_contains(url_part)
             )
         except TimeoutException:
             return False
     
     def wait_for_toast(self, expected_text=None, timeout=5):
-        """等待toast提示出现并返回其文本内容，使用轮询机制提高可靠性
+        """等待toast提示出现并返回其文本内容
+        
+        页面加载时注入的脚本会记录每一条toast，此方法只需一次异步脚本调用读取缓冲区，
+        即使toast出现后很快消失也不会漏掉。每条toast只会被读取一次。
         
         Args:
             expected_text: 预期toast文本，为None时只返回实际文本
-            timeout: 等待超时时间
+            timeout: 等待超时时间，需小于driver的脚本超时时间(默认30秒)
             
         Returns:
             tuple: (是否匹配预期, 实际toast文本)，如果toast未出现则返回(False, None)
         """
-        # 由于toast可能出现和消失很快，使用轮询方式检查
-        max_attempts = 10
-        poll_interval = min(timeout / max_attempts, 0.5)  # 最大0.5秒一次轮询
-        start_time = time.time()
-        end_time = start_time + timeout
+        result = self.driver.execute_async_script(
+            self.TOAST_CAPTURE_SCRIPT + self.TOAST_WAIT_SCRIPT,
+            expected_text,
+            int(timeout * 1000)
+        )
+        toast = result["toast"]
+        if toast is None:
+            # 截图记录未找到toast的状态
+            screenshot_service.capture(self.driver, "toast_not_found")
+            return (False, None)
         
-        for attempt in range(max_attempts):
-            try:
-                # 使用可见性条件等待toast
-                toast = WebDriverWait(self.driver, poll_interval).until(
-                    EC.visibility_of_element_located(self.TOAST)
-                )
-                
-                actual_text = toast.text
-                if actual_text:  # 确保toast有文本内容
-                    # 截图记录toast出现
-                    self.driver.save_screenshot(f"toast_found_{attempt}.png")
-                    
-                    if expected_text is None:
-                        return (True, actual_text)
-                    return (expected_text in actual_text, actual_text)
-                
-            except (TimeoutException, NoSuchElementException, StaleElementReferenceException):
-                # 如果超出总超时时间，退出循环
-                if time.time() > end_time:
-                    break
-                # 否则继续尝试
-                time.sleep(poll_interval)
-                continue
+        # 截图记录toast出现
+        screenshot_service.capture(self.driver, "toast_found")
+        return (result["matched"], toast["text"])
+    
+    def wait_for_transition(self, locator, condition, expected, text_selector=None, timeout=5):
+        """在页面内监听DOM变化，等待元素进入预期状态
         
-        # 如果到这里仍然没有找到toast或toast没有文本，尝试最后一次直接查找
-        try:
-            elements = self.driver.find_elements(*self.TOAST)
-            if elements:
-                for element in elements:
-                    try:
-                        text = element.text
-                        if text:
-                            if expected_text is None:
-                                return (True, text)
-                            return (expected_text in text, text)
-                    except:
-                        pass
-        except:
-            pass
+        Args:
+            locator: 元素定位器，除count_above外只检查第一个匹配元素
+            condition: 等待条件，has_class/no_class(包含/不包含class)、text_is/text_not(文本等于/不等于)、
+                       count_above(匹配元素数量大于expected)
+            expected: 条件的预期值
+            text_selector: 读取文本的子元素选择器，为None时读取元素自身的文本
+            timeout: 等待超时时间，需小于driver的脚本超时时间(默认30秒)
+            
+        Returns:
+            float: 从开始等待到状态变化的耗时(秒)，超时未变化时返回None
+        """
+        by, value = self._to_script_locator(locator)
+        result = self.driver.execute_async_script(
+            self.TRANSITION_WAIT_SCRIPT,
+            by, value, condition, expected, text_selector, int(timeout * 1000)
+        )
+        if not result["ok"]:
+            screenshot_service.capture(self.driver, f"transition_timeout_{condition}")
+            return None
+        return result["elapsed"] / 1000
+    
+    def wait_for_network_idle(self, url_pattern=None, quiet_ms=500, timeout=None):
+        """等待进行中的fetch/XHR请求全部完成
+        
+        Args:
+            url_pattern: 只关注url匹配该正则表达式的请求，为None时关注所有请求
+            quiet_ms: 没有新请求的静默时间(毫秒)，达到后判定为空闲
+            timeout: 等待超时时间，为None时使用默认超时时间
             
-        # 截图记录未找到toast的状态
-        self.driver.save_screenshot("toast_not_found.png")
-        return (False, None)
+        Returns:
+            float: 从开始等待到最后一个请求结束的耗时(秒)
+        """
+        if timeout is None:
+            timeout = self.timeout
+        return self.network.wait_for_idle(url_pattern, quiet_ms, timeout, self.poll_frequency)
     
     def get_current_url(self):
         """获取当前URL"""
@@ -81,9 +81,13 @@ class HomePage(BasePage):
             threads[index].click()
         return self
     
-    def is_logged_in(self):
-        """判断是否已登录"""
-        return self.is_element_present(self.USER_TRIGGER, timeout=3)
+    def is_logged_in(self, timeout=3):
+        """判断是否已登录
+
+        等待页头渲染出用户菜单或登录按钮之一后立即判断，未登录时不用等满超时时间
+        """
+        self.wait_for_any((self.USER_TRIGGER, self.LOGIN_BUTTON), timeout)
+        return self.exists_now(self.USER_TRIGGER)
     
     def is_thread_list_loaded(self):
         """判断帖子列表是否加载完成"""
@@ -41,8 +41,8 @@ class LoginPage(BasePage):
     
     def is_login_button_enabled(self):
         """判断登录按钮是否可点击"""
-        button = self.find_element(self.LOGIN_BUTTON)
-        return "is-disabled" not in button.get_attribute("class")
+        button = self.extract_element(self.LOGIN_BUTTON)
+        return "is-disabled" not in button["classes"]
     
     def is_redirect_to_home(self, timeout=5):
         """检查是否重定向到主页"""
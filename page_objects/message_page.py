@@ -26,9 +26,9 @@ class MessagePage(BasePage):
         self.open(f"message?page=chat&userId={user_id}&nickname={nickname}")
         return self
     
-    def input_message(self, message):
-        """输入私信"""
-        self.input_text(self.MESSAGE_TEXTAREA, message)
+    def input_message(self, message, mode=None):
+        """输入私信，测试长度限制时mode应为"keys"，与用户输入一样受maxlength限制"""
+        self.input_text(self.MESSAGE_TEXTAREA, message, mode=mode)
         return self
     
     def click_send_button(self):
@@ -36,6 +36,18 @@ class MessagePage(BasePage):
         self.click(self.SEND_BUTTON)
         return self
     
+    def click_send_button_and_wait(self, timeout=5):
+        """发送私信并等待新私信出现在对话中
+        
+        Returns:
+            float: 点击后到新私信渲染的耗时(秒)，超时未出现时返回None
+        """
+        count = len(self.extract_elements(self.MESSAGES, timeout=0))
+        self.click_send_button()
+        response_time = self.wait_for_network_idle(self.API_PATTERN, timeout=timeout)
+        latency = self.wait_for_transition(self.MESSAGES, "count_above", count, timeout=timeout)
+        return None if latency is None else response_time + latency
+    
     def send_message(self, message):
         """发送私信流程"""
         self.input_message(message)
@@ -43,20 +55,22 @@ class MessagePage(BasePage):
         return self
     
     def get_messages(self):
-        """获取所有私信"""
-        return self.find_elements(self.MESSAGES)
+        """获取所有私信，私信接口返回后只查询一次，没有私信时不等待"""
+        self.wait_for_data_loaded()
+        return self.find_elements(self.MESSAGES, timeout=0)
     
     def get_last_message(self):
-        """获取最新的私信"""
-        messages = self.get_messages()
+        """获取最新的私信，一次脚本调用读取所有私信文本"""
+        self.wait_for_data_loaded()
+        messages = self.extract_elements(self.MESSAGES, timeout=0)
         if messages:
-            return messages[-1].text
+            return messages[-1]["text"]
         return None
     
     def is_message_sent(self, message):
         """判断私信是否发送成功"""
         last_message = self.get_last_message()
-        return message in last_message
+        return last_message is not None and message in last_message
     
     def check_toast_message(self, expected_message):
         """检查toast提示信息"""
@@ -66,8 +66,8 @@ class RegisterPage(BasePage):
     
     def is_register_button_enabled(self):
         """判断注册按钮是否可点击"""
-        button = self.find_element(self.REGISTER_BUTTON)
-        return "is-disabled" not in button.get_attribute("class")
+        button = self.extract_element(self.REGISTER_BUTTON)
+        return "is-disabled" not in button["classes"]
     
     def check_toast_message(self, expected_message):
         """检查toast提示信息
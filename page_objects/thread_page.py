@@ -1,6 +1,5 @@
 from selenium.webdriver.common.by import By
 from page_objects.base_page import BasePage
-import time
 
 class ThreadPage(BasePage):
     """帖子页面类，包含帖子页面特有的元素和方法"""
@@ -8,6 +7,10 @@ class ThreadPage(BasePage):
     # 定位器
     LIKE_BUTTON = (By.XPATH, "//span[contains(text(),'赞')]/..")
     LIKED_BUTTON_CLASS = "_32k6KpwFJXU4ufhoOTLCa_"
+    LIKED_BUTTON = (
+        By.XPATH,
+        f"//span[contains(text(),'赞')]/parent::*[contains(concat(' ', @class, ' '), ' {LIKED_BUTTON_CLASS} ')]"
+    )
     COMMENT_TEXTAREA = (
         By.CSS_SELECTOR,
         "#__next > div > div > div > div > div > div > div > div:nth-child(1) > div> div > div:nth-child(2) > div > div> div > textarea"
@@ -38,11 +41,20 @@ class ThreadPage(BasePage):
         self.click(self.LIKE_BUTTON)
         return self
 
+    def toggle_like(self, timeout=5):
+        """点击赞按钮并等待点赞状态切换
+        
+        Returns:
+            float: 点击后到按钮class变化的耗时(秒)，超时未变化时返回None
+        """
+        condition = "no_class" if self.is_thread_liked() else "has_class"
+        self.click_like_button()
+        return self.wait_for_transition(self.LIKE_BUTTON, condition, self.LIKED_BUTTON_CLASS, timeout=timeout)
+
     def is_thread_liked(self):
-        """判断帖子是否已点赞"""
-        time.sleep(3)  # 等待脚本响应
-        like_button = self.find_element(self.LIKE_BUTTON)
-        return self.LIKED_BUTTON_CLASS in like_button.get_attribute("class")
+        """判断帖子是否已点赞，赞按钮出现后立即判断，未点赞时不等待"""
+        self.wait_for_element(self.LIKE_BUTTON)
+        return self.exists_now(self.LIKED_BUTTON)
 
     def input_comment(self, comment):
         """输入评论"""
@@ -54,6 +66,18 @@ class ThreadPage(BasePage):
         self.click(self.COMMENT_SUBMIT_BUTTON)
         return self
     
+    def submit_comment_and_wait(self, timeout=5):
+        """提交评论并等待新评论出现在评论列表中
+        
+        Returns:
+            float: 点击后到新评论渲染的耗时(秒)，超时未出现时返回None
+        """
+        count = len(self.extract_elements(self.COMMENT_LIST, timeout=0))
+        self.submit_comment()
+        response_time = self.wait_for_network_idle(self.API_PATTERN, timeout=timeout)
+        latency = self.wait_for_transition(self.COMMENT_LIST, "count_above", count, timeout=timeout)
+        return None if latency is None else response_time + latency
+    
     def create_comment(self, comment):
         """评论流程"""
         self.input_comment(comment)
@@ -61,23 +85,20 @@ class ThreadPage(BasePage):
         return self
     
     def get_comments(self):
-        """获取评论列表"""
-        return self.find_elements(self.COMMENT_LIST)
+        """获取评论列表，评论接口返回后只查询一次，没有评论时不等待"""
+        self.wait_for_data_loaded()
+        return self.find_elements(self.COMMENT_LIST, timeout=0)
     
     def is_comment_present(self, comment):
-        """判断评论是否存在"""
-        comments = self.get_comments()
+        """判断评论是否存在，一次脚本调用读取所有评论的title"""
+        self.wait_for_data_loaded()
+        comments = self.extract_elements(self.COMMENT_LIST, attributes=["title"], timeout=0)
         if not comments:
             return False
             
         comment_text = comment[:20] if len(comment) > 20 else comment
         
-        for comment_element in comments:
-            title = comment_element.get_attribute("title")
-            if title == comment_text:
-                return True
-        
-        return False
+        return any(item["attributes"]["title"] == comment_text for item in comments)
     
     def check_toast_message(self, expected_message):
         """检查toast提示信息"""
@@ -18,6 +18,15 @@ class UserPage(BasePage):
         "#__next > div > div > div > div > div > div > div:nth-child(1) > div > div > div > div > div > div> div > div> div> div> button:nth-child(2)"
     )
     
+    # 关注、屏蔽按钮在两种状态下的文本
+    FOLLOWING_TEXT = "已关注"
+    NOT_FOLLOWING_TEXT = "关注"
+    BLOCKING_TEXT = "解除屏蔽"
+    NOT_BLOCKING_TEXT = "屏蔽"
+    # 已关注、已屏蔽状态下的按钮
+    FOLLOWING_BUTTON = (By.XPATH, f"//button[span[text()='{FOLLOWING_TEXT}']]")
+    UNBLOCK_BUTTON = (By.XPATH, f"//span[text()='{BLOCKING_TEXT}']/..")
+    
     def __init__(self, driver):
         super().__init__(driver)
     
@@ -36,6 +45,26 @@ class UserPage(BasePage):
         self.click(self.BLOCK_BUTTON)
         return self
     
+    def toggle_follow(self, timeout=5):
+        """点击关注按钮并等待按钮文本切换为另一种状态
+        
+        Returns:
+            float: 点击后到按钮显示目标状态的耗时(秒)，超时时返回None
+        """
+        target = self.NOT_FOLLOWING_TEXT if self.is_following() else self.FOLLOWING_TEXT
+        self.click_follow_button()
+        return self.wait_for_transition(self.FOLLOW_BUTTON, "text_is", target, text_selector="span", timeout=timeout)
+    
+    def toggle_block(self, timeout=5):
+        """点击屏蔽按钮并等待按钮文本切换为另一种状态
+        
+        Returns:
+            float: 点击后到按钮显示目标状态的耗时(秒)，超时时返回None
+        """
+        target = self.NOT_BLOCKING_TEXT if self.is_blocking() else self.BLOCKING_TEXT
+        self.click_block_button()
+        return self.wait_for_transition(self.BLOCK_BUTTON, "text_is", target, text_selector="span", timeout=timeout)
+    
     def click_send_message_button(self):
         """点击发私信按钮"""
         self.click(self.SEND_MESSAGE_BUTTON)
@@ -43,20 +72,18 @@ class UserPage(BasePage):
     
     def get_follow_button_text(self):
         """获取关注按钮文本"""
-        button = self.find_element(self.FOLLOW_BUTTON)
-        span = button.find_element(By.TAG_NAME, "span")
-        return span.text
+        return self.extract_element(self.FOLLOW_BUTTON, text_selector="span")["text"]
     
     def get_block_button_text(self):
         """获取屏蔽按钮文本"""
-        button = self.find_element(self.BLOCK_BUTTON)
-        span = button.find_element(By.TAG_NAME, "span")
-        return span.text
+        return self.extract_element(self.BLOCK_BUTTON, text_selector="span")["text"]
     
     def is_following(self):
-        """判断是否已关注"""
-        return self.get_follow_button_text() == "已关注"
+        """判断是否已关注，关注按钮出现后立即判断，未关注时不等待"""
+        self.wait_for_element(self.FOLLOW_BUTTON)
+        return self.exists_now(self.FOLLOWING_BUTTON)
     
     def is_blocking(self):
-        """判断是否已屏蔽"""
-        return self.get_block_button_text() == "解除屏蔽" 
\ No newline at end of file
+        """判断是否已屏蔽，屏蔽按钮出现后立即判断，未屏蔽时不等待"""
+        self.wait_for_element(self.BLOCK_BUTTON)
+        return self.exists_now(self.UNBLOCK_BUTTON) 
\ No newline at end of file
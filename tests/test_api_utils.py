@@ -0,0 +1,157 @@
+import json
+import threading
+import pytest
+import allure
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from utils.api_utils import ForumApiClient, ForumApiError, ForumState
+
+class StubForumHandler(BaseHTTPRequestHandler):
+    """模拟Discuz! Q接口的请求处理器，状态保存在server.state中"""
+
+    def _reply(self, data=None, code=0, message=""):
+        body = json.dumps({"Code": code, "Message": message, "Data": data}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        state = self.server.state
+        self.server.requests.append(("GET", url.path, query, self.headers.get("Authorization")))
+        if url.path == "/apiv3/user":
+            user_id = query["userId"][0]
+            self._reply({
+                "follow": 1 if user_id in state["following"] else 0,
+                "isDeny": user_id in state["blocking"]
+            })
+        elif url.path == "/apiv3/thread.detail":
+            thread_id = query["threadId"][0]
+            self._reply({"postId": int(thread_id) * 10, "isLike": thread_id in state["liked"]})
+        else:
+            self._reply(code=-4004, message="接口不存在")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        data = json.loads(self.rfile.read(length) or b"{}")
+        state = self.server.state
+        self.server.requests.append(("POST", url.path, data, self.headers.get("Authorization")))
+        if url.path == "/apiv3/users/username.login":
+            if data["password"] != "test01":
+                self._reply(code=-4009, message="密码错误")
+            else:
+                self._reply({"accessToken": "token-" + data["username"]})
+        elif url.path == "/apiv3/follow.create":
+            state["following"].add(str(data["toUserId"]))
+            self._reply({})
+        elif url.path == "/apiv3/follow.delete":
+            state["following"].discard(str(data["id"]))
+            self._reply({})
+        elif url.path == "/apiv3/user/deny":
+            state["blocking"].add(str(data["id"]))
+            self._reply({})
+        elif url.path == "/apiv3/user/deny.delete":
+            state["blocking"].discard(str(data["id"]))
+            self._reply({})
+        elif url.path == "/apiv3/posts.update":
+            thread_id = str(data["id"] // 10)
+            if data["data"]["attributes"]["isLiked"]:
+                state["liked"].add(thread_id)
+            else:
+                state["liked"].discard(thread_id)
+            self._reply({})
+        else:
+            self._reply(code=-4004, message="接口不存在")
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture(scope="function")
+def stub_server():
+    """启动本地模拟论坛接口服务"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubForumHandler)
+    server.state = {"following": set(), "blocking": set(), "liked": set()}
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture(scope="function")
+def api_client(stub_server):
+    """连接到模拟服务的API客户端"""
+    host, port = stub_server.server_address
+    client = ForumApiClient(base_url=f"http://{host}:{port}")
+    yield client
+    client.close()
+
+@allure.epic("论坛测试")
+@allure.feature("论坛API客户端")
+class TestForumApiClient:
+
+    @allure.story("登录")
+    def test_login_sends_token(self, api_client, stub_server):
+        """测试登录后请求携带访问令牌"""
+        api_client.login("test01", "test01")
+        api_client.is_following("2")
+
+        method, path, _, authorization = stub_server.requests[-1]
+        assert (method, path) == ("GET", "/apiv3/user")
+        assert authorization == "Bearer token-test01"
+
+    @allure.story("登录")
+    def test_api_error(self, api_client):
+        """测试接口返回错误码时抛出异常"""
+        with pytest.raises(ForumApiError):
+            api_client.login("test01", "wrong")
+
+    @allure.story("关注、屏蔽、点赞")
+    def test_toggle_state(self, api_client):
+        """测试关注、屏蔽、点赞状态的设置和查询"""
+        api_client.login("test01", "test01")
+
+        api_client.set_following("2", True)
+        api_client.set_blocking("2", True)
+        api_client.set_thread_liked("2", True)
+        assert api_client.is_following("2")
+        assert api_client.is_blocking("2")
+        assert api_client.is_thread_liked("2")
+
+        api_client.set_following("2", False)
+        api_client.set_blocking("2", False)
+        api_client.set_thread_liked("2", False)
+        assert not api_client.is_following("2")
+        assert not api_client.is_blocking("2")
+        assert not api_client.is_thread_liked("2")
+
+    @allure.story("前置状态恢复")
+    def test_forum_state_restore(self, api_client, stub_server):
+        """测试ForumState设置前置状态并恢复原始状态"""
+        api_client.login("test01", "test01")
+        stub_server.state["following"].add("2")
+
+        state = ForumState(api_client)
+        state.set_following("2", False).set_blocking("2", True)
+        assert stub_server.state["following"] == set()
+        assert stub_server.state["blocking"] == {"2"}
+
+        state.restore()
+        assert stub_server.state["following"] == {"2"}
+        assert stub_server.state["blocking"] == set()
+
+    @allure.story("前置状态恢复")
+    def test_forum_state_skips_unchanged(self, api_client, stub_server):
+        """测试状态已符合预期时不发送修改请求"""
+        api_client.login("test01", "test01")
+
+        state = ForumState(api_client)
+        state.set_thread_liked("2", False)
+        state.restore()
+
+        posts = [request for request in stub_server.requests if request[1] == "/apiv3/posts.update"]
+        assert posts == []
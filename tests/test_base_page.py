@@ -0,0 +1,63 @@
+import time
+import allure
+import pytest
+from page_objects.base_page import BasePage
+from page_objects.home_page import HomePage
+from page_objects.thread_page import ThreadPage
+
+class StubDomDriver:
+    """按定位器返回预设元素的假driver，记录find_elements的调用次数"""
+
+    def __init__(self, present=()):
+        self.caps = {"browserName": "firefox"}
+        self.present = set(present)
+        self.lookups = 0
+
+    def find_elements(self, by, value):
+        self.lookups += 1
+        return [object()] if (by, value) in self.present else []
+
+    def execute_script(self, script, *args):
+        # 网络钩子没有记录任何请求
+        return {"pending": [], "events": []}
+
+@allure.epic("测试框架")
+@allure.feature("页面等待")
+class TestAbsenceChecks:
+
+    @allure.story("快速判断不存在")
+    def test_exists_now_checks_once(self):
+        """测试exists_now和assert_absent只查询一次，不等待"""
+        driver = StubDomDriver()
+        page = BasePage(driver)
+
+        start = time.monotonic()
+        assert not page.exists_now(BasePage.TOAST)
+        page.assert_absent(BasePage.TOAST)
+        assert time.monotonic() - start < 0.1
+        assert driver.lookups == 2
+
+        driver.present.add(BasePage.TOAST)
+        with pytest.raises(AssertionError):
+            page.assert_absent(BasePage.TOAST)
+
+    @allure.story("快速判断不存在")
+    def test_logged_out_check_returns_without_timeout(self):
+        """测试页头显示登录按钮时立即判断为未登录，不等满超时时间"""
+        page = HomePage(StubDomDriver([HomePage.LOGIN_BUTTON]))
+
+        start = time.monotonic()
+        assert not page.is_logged_in(timeout=3)
+        assert time.monotonic() - start < 0.5
+
+        page.driver.present.add(HomePage.USER_TRIGGER)
+        assert page.is_logged_in(timeout=3)
+
+    @allure.story("快速判断不存在")
+    def test_empty_comment_list_returns_after_data_loaded(self):
+        """测试没有评论时在接口请求结束后返回空列表，不等满默认超时时间"""
+        page = ThreadPage(StubDomDriver())
+
+        start = time.monotonic()
+        assert page.get_comments() == []
+        assert time.monotonic() - start < page.timeout / 2
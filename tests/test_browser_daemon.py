@@ -0,0 +1,51 @@
+import allure
+from utils.browser_daemon import BrowserDaemon
+from utils.webdriver_utils import WebDriverFactory
+
+class StubDaemonBrowser:
+    """常驻浏览器中当前标签页通过CDP注册的页面初始化脚本"""
+
+    def __init__(self):
+        self.scripts = {}
+        self.next_id = 0
+
+class StubAttachedDriver:
+    """每次连接常驻浏览器得到的新driver，共享同一个浏览器的脚本注册表"""
+
+    def __init__(self, browser):
+        self.caps = {"browserName": "chrome"}
+        self.browser = browser
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == "Page.addScriptToEvaluateOnNewDocument":
+            self.browser.next_id += 1
+            identifier = str(self.browser.next_id)
+            self.browser.scripts[identifier] = params["source"]
+            return {"identifier": identifier}
+        if cmd == "Page.removeScriptToEvaluateOnNewDocument":
+            self.browser.scripts.pop(params["identifier"], None)
+        return {}
+
+@allure.epic("测试框架")
+@allure.feature("常驻浏览器")
+class TestBrowserDaemon:
+
+    @allure.story("初始化脚本")
+    def test_init_scripts_do_not_pile_up_across_runs(self, tmp_path, monkeypatch):
+        """测试多次运行连接常驻浏览器后，每个初始化脚本只注册一次"""
+        monkeypatch.setattr(WebDriverFactory, "profile", "fast")
+        browser = StubDaemonBrowser()
+        monkeypatch.setattr(WebDriverFactory, "attach_session", lambda *args: StubAttachedDriver(browser))
+        daemon = BrowserDaemon(str(tmp_path / "daemon.json"))
+        daemon._save_state({
+            "browser": "chrome", "service_url": "", "session_id": "", "capabilities": {}, "init_scripts": []
+        })
+
+        for _ in range(3):
+            driver = daemon.attach(reset_init_scripts=True)
+            WebDriverFactory.install_init_scripts(driver, ["window.__toast = true;"])
+            daemon.save_init_scripts(driver)
+
+        assert sorted(browser.scripts.values()) == sorted([
+            WebDriverFactory.DISABLE_ANIMATIONS_SCRIPT, "window.__toast = true;"
+        ])
@@ -0,0 +1,83 @@
+import allure
+from utils.context_utils import BrowserContextManager
+from utils.webdriver_utils import WebDriverFactory
+
+class StubSwitchTo:
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current_window_handle = handle
+
+class StubCdpDriver:
+    """记录CDP命令及其执行时所在标签页的假Chrome driver"""
+
+    def __init__(self):
+        self.caps = {"browserName": "chrome"}
+        self.current_window_handle = "default"
+        self.window_handles = ["default"]
+        self.switch_to = StubSwitchTo(self)
+        self.commands = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.commands.append((self.current_window_handle, cmd, params))
+        if cmd == "Target.createBrowserContext":
+            return {"browserContextId": "context"}
+        if cmd == "Target.createTarget":
+            self.window_handles.append("target")
+            return {"targetId": "target"}
+        if cmd == "Page.addScriptToEvaluateOnNewDocument":
+            return {"identifier": str(len(self.commands))}
+        return {}
+
+@allure.epic("测试框架")
+@allure.feature("浏览器上下文")
+class TestBrowserContextManager:
+
+    @allure.story("新建会话")
+    def test_new_session_applies_profile_to_new_target(self, monkeypatch):
+        """测试新上下文的标签页上应用屏蔽URL、关闭动画和原driver已注册的初始化脚本"""
+        monkeypatch.setattr(WebDriverFactory, "profile", "fast")
+        driver = StubCdpDriver()
+        WebDriverFactory.install_init_scripts(driver, ["window.__registered = true;"])
+        manager = BrowserContextManager(driver)
+
+        session = manager.new_session()
+        target_commands = [(cmd, params) for handle, cmd, params in driver.commands if handle == "target"]
+
+        assert session.driver.handle == "target"
+        assert ("Network.setBlockedURLs", {"urls": WebDriverFactory.get_profile()["blocked_urls"]}) in target_commands
+        assert [params["source"] for cmd, params in target_commands if cmd == "Page.addScriptToEvaluateOnNewDocument"] == [
+            WebDriverFactory.DISABLE_ANIMATIONS_SCRIPT, "window.__registered = true;"
+        ]
+
+    @allure.story("新建会话")
+    def test_new_session_applies_login_and_follows_window_switches(self):
+        """测试新会话注入登录状态，原driver切换标签页后代理仍切回本会话的标签页"""
+        driver = StubCdpDriver()
+        manager = BrowserContextManager(driver)
+        applied = []
+
+        class StubLoginSession:
+            def apply(self, session_driver):
+                applied.append(session_driver.current_window_handle)
+
+        session = manager.new_session(login_session=StubLoginSession())
+        assert applied == ["target"]
+
+        driver.switch_to.window("default")
+        session.driver.execute_cdp_cmd("Runtime.evaluate", {})
+        assert driver.commands[-1][0] == "target"
+
+    @allure.story("关闭会话")
+    def test_close_disposes_contexts(self):
+        """测试关闭时销毁新建的上下文并切换回default会话的标签页"""
+        driver = StubCdpDriver()
+        manager = BrowserContextManager(driver)
+        manager.new_session()
+
+        manager.close()
+
+        assert driver.commands[-1][1:] == ("Target.disposeBrowserContext", {"browserContextId": "context"})
+        assert driver.current_window_handle == "default"
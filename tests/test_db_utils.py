@@ -0,0 +1,334 @@
+import threading
+import pytest
+import allure
+import pymysql
+from utils.account_utils import ForumAccount, AccountPool
+from utils.db_utils import ConnectionPool, DatabaseUtils
+
+class StubConnection:
+    """记录ping和关闭次数的假连接"""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.open = True
+        self.pings = 0
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+
+    def close(self):
+        self.open = False
+
+class StubDatabase(DatabaseUtils):
+    """从内存中的表查询ID并记录执行的SQL"""
+
+    def __init__(self, rows):
+        super().__init__()
+        self.rows = rows
+        self.queries = []
+
+    def execute_query(self, sql, params=None):
+        self.queries.append((sql, list(params or ())))
+        values = set(params or ())
+        latest = {}
+        for row_id, value in self.rows:
+            if value in values:
+                latest[value] = max(latest.get(value, 0), row_id)
+        return [{"value": value, "id": row_id} for value, row_id in latest.items()]
+
+class StubWriteDatabase(DatabaseUtils):
+    """使用固定的表结构，记录执行的写入SQL，查询时返回预设的结果"""
+
+    COLUMNS = {
+        "users": (
+            ["id", "username", "nickname", "password", "mobile", "union_id"],
+            {"username", "mobile", "union_id"},
+            {"id", "username", "nickname", "password", "union_id"}
+        ),
+        "threads": (["id", "user_id", "title"], set(), {"id", "user_id"}),
+        "posts": (["id", "thread_id", "user_id", "content", "is_first"], set(), {"id", "thread_id", "user_id"}),
+    }
+
+    def __init__(self, results=None):
+        super().__init__()
+        self.pool = ConnectionPool(size=1, connect=StubConnection)
+        self.results = results or {}
+        self.updates = []
+
+    def table_columns(self, table):
+        return self.COLUMNS[table]
+
+    def execute_query(self, sql, params=None):
+        return next(result for prefix, result in self.results.items() if sql.startswith(prefix))
+
+    def execute_update(self, sql, params=None):
+        self.updates.append((sql, list(params or ())))
+        return 1
+
+@allure.epic("测试框架")
+@allure.feature("数据库连接池")
+class TestConnectionPool:
+
+    @allure.story("连接复用")
+    def test_connections_are_reused(self):
+        """测试归还的连接被再次借出，连接参数原样传给connect"""
+        pool = ConnectionPool(size=2, connect=StubConnection, host="db")
+        connection = pool.checkout()
+        pool.checkin(connection)
+
+        assert pool.checkout() is connection
+        assert connection.kwargs == {"host": "db"}
+
+    @allure.story("连接上限")
+    def test_checkout_waits_until_timeout(self):
+        """测试连接全部借出时等待超时"""
+        pool = ConnectionPool(size=1, timeout=0.1, connect=StubConnection)
+        pool.checkout()
+
+        with pytest.raises(TimeoutError):
+            pool.checkout()
+
+    @allure.story("连接上限")
+    def test_checkin_wakes_waiting_thread(self):
+        """测试归还连接后等待中的线程拿到该连接"""
+        pool = ConnectionPool(size=1, timeout=5, connect=StubConnection)
+        connection = pool.checkout()
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(pool.checkout()))
+        waiter.start()
+        pool.checkin(connection)
+        waiter.join(5)
+
+        assert result == [connection]
+
+    @allure.story("健康检查")
+    def test_idle_connection_is_pinged(self, monkeypatch):
+        """测试空闲超过间隔的连接在借出前校验"""
+        pool = ConnectionPool(size=1, connect=StubConnection)
+        connection = pool.checkout()
+        pool.checkin(connection)
+        pool.checkout()
+        assert connection.pings == 0
+        pool.checkin(connection)
+
+        monkeypatch.setattr(ConnectionPool, "PING_INTERVAL", 0)
+        pool.checkout()
+        assert connection.pings == 1
+
+    @allure.story("健康检查")
+    def test_broken_connection_is_discarded(self):
+        """测试连接异常时关闭连接并释放名额"""
+        pool = ConnectionPool(size=1, timeout=0.1, connect=StubConnection)
+        with pytest.raises(pymysql.err.OperationalError):
+            with pool.connection() as connection:
+                raise pymysql.err.OperationalError(2013, "Lost connection")
+
+        assert not connection.open
+        assert pool.checkout() is not connection
+
+    @allure.story("线程亲和")
+    def test_nested_blocks_share_connection(self):
+        """测试同一线程嵌套借出时复用同一个连接，其他线程使用另一个连接"""
+        pool = ConnectionPool(size=2, connect=StubConnection)
+        other = []
+        with pool.connection() as outer:
+            with pool.connection() as inner:
+                assert inner is outer
+            thread = threading.Thread(target=lambda: other.append(pool.checkout()))
+            thread.start()
+            thread.join(5)
+
+        assert other and other[0] is not outer
+
+@allure.epic("测试框架")
+@allure.feature("ID查询")
+class TestIdLookup:
+
+    @allure.story("批量查询")
+    def test_lookup_uses_one_query_and_cache(self):
+        """测试多个值用一条IN查询解析，再次查询时只查询未缓存的值"""
+        database = StubDatabase([(1, "a"), (2, "b"), (3, "b")])
+
+        assert database.get_user_ids(["a", "b", "missing"]) == {"a": 1, "b": 3}
+        assert len(database.queries) == 1
+        assert "IN (%s, %s, %s)" in database.queries[0][0]
+
+        assert database.get_user_id(username="a") == 1
+        assert database.get_user_ids(["b", "missing"]) == {"b": 3}
+        assert database.queries[1][1] == ["missing"]
+
+    @allure.story("缓存失效")
+    def test_invalidate_and_lru_eviction(self, monkeypatch):
+        """测试清除缓存后重新查询，超过容量时淘汰最久未使用的条目"""
+        monkeypatch.setattr(DatabaseUtils, "ID_CACHE_SIZE", 2)
+        database = StubDatabase([(1, "a"), (2, "b"), (3, "c")])
+        database.get_user_ids(["a", "b"])
+        database.get_user_ids(["a"])
+        database.get_user_ids(["c"])
+
+        database.get_user_ids(["a", "b"])
+        assert database.queries[-1][1] == ["b"]
+
+        database.invalidate_ids("users")
+        database.get_user_ids(["a"])
+        assert database.queries[-1][1] == ["a"]
+
+    @allure.story("批量查询")
+    def test_thread_lookup_with_created_window(self):
+        """测试按标题查询帖子时附加创建时间条件"""
+        database = StubDatabase([(7, "标题")])
+
+        assert database.get_thread_id(title="标题", created_after="2024-01-01 00:00:00") == 7
+        sql, params = database.queries[0]
+        assert "created_at >= %s" in sql
+        assert params == ["标题", "2024-01-01 00:00:00"]
+
+    @allure.story("持久化校验")
+    def test_wait_for_row_backs_off_until_found(self, monkeypatch):
+        """测试未查到数据时按翻倍间隔轮询，查到后返回耗时"""
+        sleeps = []
+        monkeypatch.setattr("utils.db_utils.time.sleep", sleeps.append)
+        database = StubDatabase([])
+        results = iter([[], [], [], [{"id": 1}]])
+        database.execute_query = lambda sql, params=None: next(results)
+
+        assert database.wait_for_row("SELECT 1", timeout=5) is not None
+        assert sleeps == [0.01, 0.02, 0.04]
+
+    @allure.story("持久化校验")
+    def test_comment_lookup_compares_content_hash(self):
+        """测试按帖子、用户、起始ID和内容MD5查询评论"""
+        database = StubDatabase([])
+        database.wait_for_row = lambda sql, params, timeout: (sql, params)
+
+        sql, params = database.wait_for_comment("2", 5, "评论内容", since_id=100)
+        assert "id > %s AND MD5(content) = %s" in sql
+        assert params == ("2", 5, 100, "03448492355656c6712fe2ebfbf67d18")
+
+    @allure.story("持久化校验")
+    def test_message_lookup_starts_after_latest_id(self):
+        """测试私信查询只匹配发送前最大ID之后写入的私信"""
+        database = StubDatabase([])
+        database.execute_query = lambda sql, params=None: [{"id": 40}]
+        database.wait_for_row = lambda sql, params, timeout: (sql, params)
+
+        since_id = database.latest_id("dialog_message")
+        sql, params = database.wait_for_message(5, "2", "私信内容", since_id)
+        assert "m.id > %s" in sql
+        assert params[:3] == (5, "2", 40)
+
+@allure.epic("测试框架")
+@allure.feature("测试数据复制")
+class TestDataCloning:
+
+    @allure.story("复制行")
+    def test_clone_rows_overrides_columns(self):
+        """测试覆盖的列取自参数，未覆盖的唯一索引列置为NULL或UUID_SHORT()，其他列复制模板行"""
+        database = StubWriteDatabase()
+
+        assert database.clone_rows(
+            "users", "t.username = %s", ("template",),
+            [{"username": "a", "nickname": "A"}, {"username": "b", "nickname": "B"}]
+        ) == 1
+        sql, params = database.updates[0]
+        assert sql == (
+            "INSERT INTO `users` (`username`, `nickname`, `password`, `mobile`, `union_id`) "
+            "SELECT v.`username`, v.`nickname`, t.`password`, NULL, UUID_SHORT() FROM `users` AS t "
+            "JOIN (SELECT %s AS `username`, %s AS `nickname` UNION ALL SELECT %s AS `username`, %s AS `nickname`) AS v "
+            "WHERE t.username = %s"
+        )
+        assert params == ["a", "A", "b", "B", "template"]
+        assert database.clone_rows("users", "t.username = %s", ("template",), []) == 0
+        assert len(database.updates) == 1
+
+    @allure.story("复制用户")
+    def test_clone_users_copies_groups(self):
+        """测试复制用户后复制模板用户的用户组，并返回新用户的ID"""
+        database = StubWriteDatabase({"SELECT id, username FROM users": [
+            {"id": 11, "username": "a"}, {"id": 12, "username": "b"}
+        ]})
+
+        assert database.clone_users("template", [("a", "A"), ("b", "B")]) == {"a": 11, "b": 12}
+        assert database.updates[0][0].startswith("INSERT INTO `users`")
+        sql, params = database.updates[1]
+        assert sql.startswith("INSERT INTO group_user")
+        assert "u.username IN (%s, %s)" in sql
+        assert params == ["a", "b", "template"]
+
+    @allure.story("复制帖子")
+    def test_clone_thread_copies_first_post(self):
+        """测试复制帖子后以新帖子ID复制首帖内容"""
+        database = StubWriteDatabase({"SELECT LAST_INSERT_ID()": [{"id": 30}]})
+
+        assert database.clone_thread(3, 12) == 30
+        thread_sql, thread_params = database.updates[0]
+        post_sql, post_params = database.updates[1]
+        assert thread_sql.startswith("INSERT INTO `threads`")
+        assert thread_params == [12, 3]
+        assert post_sql.startswith("INSERT INTO `posts`")
+        assert post_sql.endswith("WHERE t.thread_id = %s AND t.is_first = 1")
+        assert post_params == [30, 12, 3]
+
+    @allure.story("删除用户")
+    def test_delete_users_removes_related_rows(self):
+        """测试按CLEANUP_TABLES的顺序删除私信、关系表、帖子和用户，没有用户时不执行SQL"""
+        database = StubWriteDatabase()
+
+        database.delete_users([11, 12])
+        assert [sql.split(" WHERE")[0] for sql, _ in database.updates] == [
+            f"DELETE FROM `{table}`" for table in dict.fromkeys(table for table, _, _ in database.CLEANUP_TABLES)
+        ]
+        deleted = dict((sql.split("`")[1], (sql, params)) for sql, params in database.updates)
+        assert deleted["user_follow"] == (
+            "DELETE FROM `user_follow` WHERE from_user_id IN (%s, %s) OR to_user_id IN (%s, %s)", [11, 12, 11, 12]
+        )
+        assert deleted["post_user"][1] == [11, 12] * 3
+        assert deleted["users"] == ("DELETE FROM `users` WHERE id IN (%s, %s)", [11, 12])
+
+        database.updates = []
+        assert database.delete_users([]) == 0
+        assert database.updates == []
+
+    @allure.story("账号池")
+    def test_account_pool_provision_and_release(self):
+        """测试为worker创建账号和目标帖子，释放时删除本池创建的所有用户"""
+        database = StubWriteDatabase()
+        cloned = []
+
+        def clone_users(template_username, users):
+            cloned.append((template_username, users))
+            return {username: 20 + len(cloned) * 2 + index for index, (username, _) in enumerate(users)}
+
+        database.clone_users = clone_users
+        database.clone_thread = lambda thread_id, user_id: thread_id * 100 + user_id
+        pool = AccountPool(database, "template", "secret", 3)
+
+        first = pool.provision("gw0")
+        second = pool.provision("gw1")
+        assert first.username.startswith("gw0_") and len(first.username) <= 15
+        assert first.password == "secret"
+        assert (first.user_id, first.target_user_id, first.thread_id) == (22, 23, 323)
+        assert first.target_nickname == first.target_username == cloned[0][1][1][0]
+        assert first.nickname == first.username
+        assert second.username.startswith("gw1_")
+
+        deleted = []
+        database.delete_users = deleted.append
+        pool.release()
+        assert deleted == [[22, 23, 24, 25]]
+        assert pool.user_ids == []
+
+    @allure.story("账号池")
+    def test_apply_to_keeps_input_unchanged(self):
+        """测试替换目标用户和帖子时返回副本，不修改原测试数据"""
+        test_data = {
+            "follow": [{"input": {"user_id": "1", "nickname": "test02"}}],
+            "like": [{"input": {"thread_id": "2"}}, {"description": "没有输入"}],
+        }
+        account = ForumAccount("a", "secret", target_user_id=12, target_nickname="t", thread_id=30)
+
+        result = account.apply_to(test_data)
+        assert result["follow"][0]["input"] == {"user_id": "12", "nickname": "t"}
+        assert result["like"][0]["input"] == {"thread_id": "30"}
+        assert test_data["follow"][0]["input"] == {"user_id": "1", "nickname": "test02"}
+        assert test_data["like"][0]["input"] == {"thread_id": "2"}
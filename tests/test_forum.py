@@ -1,6 +1,8 @@
 import pytest
 import allure
-import time
+from page_objects.message_page import MessagePage
+from data_generators.forum_data_generator import USER_ID, THREAD_ID
+from utils.report_utils import attach_latency
 
 @allure.epic("论坛测试")
 @allure.feature("论坛功能")
@@ -37,13 +39,13 @@ class TestForum:
             post_page.select_category(category)
         
         with allure.step("点击发布按钮"):
-            post_page.click_post_button()
+            post_page.click_post_button(wait_for_response=True)
         
         if expected_redirect:
             with allure.step("等待重定向到帖子页面"):
                 assert post_page.is_redirect_to_thread() == expected_success
     
-    '''@allure.story("发帖失败")
+    @allure.story("发帖失败")
     @allure.severity(allure.severity_level.NORMAL)
     def test_invalid_post(self, logged_in_user, post_page, forum_test_data):
         """测试无效发帖 - 内容超长"""
@@ -66,20 +68,24 @@ class TestForum:
             post_page.input_title(title)
         
         with allure.step(f"输入内容: {content[:100]}..."):
+            # 超长内容逐键输入耗时过长，快速填充不经过编辑器的长度限制，确认编辑器中确实是超长内容
             post_page.input_content(content)
+            assert len(post_page.get_content()) == len(content), "编辑器中的内容长度与输入不一致"
         
         with allure.step(f"选择分类: {category}"):
             post_page.select_category(category)
         
         with allure.step("点击发布按钮"):
-            post_page.click_post_button()
+            post_page.click_post_button(wait_for_response=True)
         
         with allure.step(f"检查toast提示消息: {expected_toast}"):
-            assert post_page.check_toast_message(expected_toast)'''
+            is_matched, actual_toast = post_page.check_toast_message(expected_toast)
+            assert is_matched, f"Toast消息不匹配。预期: {expected_toast}, 实际: {actual_toast or '无toast消息'}"
     
     @allure.story("点赞、取消点赞功能")
     @allure.severity(allure.severity_level.NORMAL)
-    def test_unlike_post(self, logged_in_user, thread_page, forum_test_data):
+    @pytest.mark.resource(f"thread:{THREAD_ID}")
+    def test_unlike_post(self, logged_in_user, thread_page, forum_state, forum_test_data):
         """测试取消点赞帖子"""
         # 获取测试数据
         test_cases = {case["case_id"]: case for case in forum_test_data["like_tests"]}
@@ -91,25 +97,27 @@ class TestForum:
         # 预期结果
         expected_like_status = test_case["expected"]["like_status"]
         
+        # 通过API先点赞，测试结束后恢复原始状态
+        with allure.step("通过API设置为已点赞状态"):
+            forum_state.set_thread_liked(thread_id, True)
+        
         with allure.step(f"打开帖子页面: {thread_id}"):
             thread_page.open_thread_page(thread_id)
         
-        # 先点赞
-        with allure.step("先点赞"):
-            thread_page.click_like_button()
-            assert thread_page.is_thread_liked()
-
-        # 再取消点赞
-        with allure.step("再取消点赞"):
-            thread_page.click_like_button()
+        with allure.step("取消点赞"):
+            latency = thread_page.toggle_like()
+            attach_latency("状态切换耗时", latency)
+            assert latency is not None, "超时未观察到点赞状态变化"
         
         with allure.step("检查点赞状态"):
             assert thread_page.is_thread_liked() == expected_like_status
+            thread_page.assert_absent(thread_page.LIKED_BUTTON)
     
     @allure.story("评论功能")
     @allure.severity(allure.severity_level.NORMAL)
     @pytest.mark.parametrize("case_id", ["comment_valid_normal", "comment_valid_max_length"])
-    def test_valid_comment(self, logged_in_user, thread_page, forum_test_data, case_id):
+    def test_valid_comment(self, logged_in_user, thread_page, database, forum_user_id, persistence_check,
+                           forum_test_data, case_id):
         """测试有效评论"""
         # 获取测试数据
         test_cases = {case["case_id"]: case for case in forum_test_data["comment_tests"]}
@@ -128,13 +136,26 @@ class TestForum:
         with allure.step(f"输入评论: {content[:50]}..."):
             thread_page.input_comment(content)
         
-        with allure.step("提交评论"):
-            thread_page.submit_comment()
-            # 等待评论显示
-            time.sleep(2)
+        if persistence_check != "ui":
+            # 记录提交前的最大ID，只匹配本次提交写入的评论
+            since_id = database.latest_id("posts")
         
-        with allure.step("检查评论是否显示"):
-            assert thread_page.is_comment_present(content) == expected_success
+        with allure.step("提交评论"):
+            if persistence_check == "db":
+                thread_page.submit_comment()
+            else:
+                latency = thread_page.submit_comment_and_wait()
+                attach_latency("状态切换耗时", latency)
+        
+        if persistence_check != "ui":
+            with allure.step("检查评论是否写入数据库"):
+                elapsed = database.wait_for_comment(thread_id, forum_user_id, content, since_id)
+                attach_latency("写入耗时", elapsed, "超时未写入")
+                assert (elapsed is not None) == expected_success
+        
+        if persistence_check != "db":
+            with allure.step("检查评论是否显示"):
+                assert thread_page.is_comment_present(content) == expected_success
     
     @allure.story("评论失败")
     @allure.severity(allure.severity_level.NORMAL)
@@ -161,11 +182,13 @@ class TestForum:
             thread_page.submit_comment()
         
         with allure.step(f"检查toast提示消息: {expected_toast}"):
-            assert thread_page.check_toast_message(expected_toast)
+            is_matched, actual_toast = thread_page.check_toast_message(expected_toast)
+            assert is_matched, f"Toast消息不匹配。预期: {expected_toast}, 实际: {actual_toast or '无toast消息'}"
     
     @allure.story("关注用户")
     @allure.severity(allure.severity_level.NORMAL)
-    def test_follow_user(self, logged_in_user, user_page, forum_test_data):
+    @pytest.mark.resource(f"user:{USER_ID}")
+    def test_follow_user(self, logged_in_user, user_page, forum_state, forum_test_data):
         """测试关注用户"""
         # 获取测试数据
         test_cases = {case["case_id"]: case for case in forum_test_data["follow_tests"]}
@@ -177,29 +200,25 @@ class TestForum:
         # 预期结果
         expected_button_text = test_case["expected"]["button_text"]
         
+        # 通过API设置为未关注状态，测试结束后恢复原始状态
+        with allure.step("通过API设置为未关注状态"):
+            forum_state.set_following(user_id, False)
+        
         with allure.step(f"打开用户主页: {user_id}"):
             user_page.open_user_page(user_id)
         
-        # 如果已经关注，先取消关注
-        if user_page.is_following():
-            with allure.step("已关注状态，先取消关注"):
-                user_page.click_follow_button()
-                time.sleep(3)
-        
         with allure.step("点击关注按钮"):
-            user_page.click_follow_button()
-            time.sleep(3)
+            latency = user_page.toggle_follow()
+            attach_latency("状态切换耗时", latency)
+            assert latency is not None, "超时未观察到关注按钮文本变化"
         
         with allure.step(f"检查关注按钮文本: {expected_button_text}"):
             assert user_page.get_follow_button_text() == expected_button_text
-        
-        # 取消关注，恢复初始状态
-        with allure.step("取消关注"):
-            user_page.click_follow_button()
     
     @allure.story("取消关注用户")
     @allure.severity(allure.severity_level.NORMAL)
-    def test_unfollow_user(self, logged_in_user, user_page, forum_test_data):
+    @pytest.mark.resource(f"user:{USER_ID}")
+    def test_unfollow_user(self, logged_in_user, user_page, forum_state, forum_test_data):
         """测试取消关注用户"""
         # 获取测试数据
         test_cases = {case["case_id"]: case for case in forum_test_data["follow_tests"]}
@@ -211,25 +230,26 @@ class TestForum:
         # 预期结果
         expected_button_text = test_case["expected"]["button_text"]
         
+        # 通过API设置为已关注状态，测试结束后恢复原始状态
+        with allure.step("通过API设置为已关注状态"):
+            forum_state.set_following(user_id, True)
+        
         with allure.step(f"打开用户主页: {user_id}"):
             user_page.open_user_page(user_id)
         
-        # 如果未关注，先关注
-        if not user_page.is_following():
-            with allure.step("未关注状态，先关注"):
-                user_page.click_follow_button()
-                time.sleep(3)
-        
         with allure.step("点击取消关注按钮"):
-            user_page.click_follow_button()
-            time.sleep(3)
+            latency = user_page.toggle_follow()
+            attach_latency("状态切换耗时", latency)
+            assert latency is not None, "超时未观察到关注按钮文本变化"
         
         with allure.step(f"检查关注按钮文本: {expected_button_text}"):
             assert user_page.get_follow_button_text() == expected_button_text
+            user_page.assert_absent(user_page.FOLLOWING_BUTTON)
     
     @allure.story("屏蔽用户")
     @allure.severity(allure.severity_level.NORMAL)
-    def test_block_user(self, logged_in_user, user_page, forum_test_data):
+    @pytest.mark.resource(f"user:{USER_ID}")
+    def test_block_user(self, logged_in_user, user_page, forum_state, forum_test_data):
         """测试屏蔽用户"""
         # 获取测试数据
         test_cases = {case["case_id"]: case for case in forum_test_data["block_tests"]}
@@ -241,29 +261,25 @@ class TestForum:
         # 预期结果
         expected_button_text = test_case["expected"]["button_text"]
         
+        # 通过API设置为未屏蔽状态，测试结束后恢复原始状态
+        with allure.step("通过API设置为未屏蔽状态"):
+            forum_state.set_blocking(user_id, False)
+        
         with allure.step(f"打开用户主页: {user_id}"):
             user_page.open_user_page(user_id)
         
-        # 如果已经屏蔽，先取消屏蔽
-        if user_page.is_blocking():
-            with allure.step("已屏蔽状态，先取消屏蔽"):
-                user_page.click_block_button()
-                time.sleep(3)
-        
         with allure.step("点击屏蔽按钮"):
-            user_page.click_block_button()
-            time.sleep(3)
+            latency = user_page.toggle_block()
+            attach_latency("状态切换耗时", latency)
+            assert latency is not None, "超时未观察到屏蔽按钮文本变化"
         
         with allure.step(f"检查屏蔽按钮文本: {expected_button_text}"):
             assert user_page.get_block_button_text() == expected_button_text
-        
-        # 取消屏蔽，恢复初始状态
-        with allure.step("取消屏蔽"):
-            user_page.click_block_button()
     
     @allure.story("取消屏蔽用户")
     @allure.severity(allure.severity_level.NORMAL)
-    def test_unblock_user(self, logged_in_user, user_page, forum_test_data):
+    @pytest.mark.resource(f"user:{USER_ID}")
+    def test_unblock_user(self, logged_in_user, user_page, forum_state, forum_test_data):
         """测试取消屏蔽用户"""
         # 获取测试数据
         test_cases = {case["case_id"]: case for case in forum_test_data["block_tests"]}
@@ -275,26 +291,28 @@ class TestForum:
         # 预期结果
         expected_button_text = test_case["expected"]["button_text"]
         
+        # 通过API设置为已屏蔽状态，测试结束后恢复原始状态
+        with allure.step("通过API设置为已屏蔽状态"):
+            forum_state.set_blocking(user_id, True)
+        
         with allure.step(f"打开用户主页: {user_id}"):
             user_page.open_user_page(user_id)
         
-        # 如果未屏蔽，先屏蔽
-        if not user_page.is_blocking():
-            with allure.step("未屏蔽状态，先屏蔽"):
-                user_page.click_block_button()
-                time.sleep(3)
-        
         with allure.step("点击取消屏蔽按钮"):
-            user_page.click_block_button()
-            time.sleep(3)
+            latency = user_page.toggle_block()
+            attach_latency("状态切换耗时", latency)
+            assert latency is not None, "超时未观察到屏蔽按钮文本变化"
         
         with allure.step(f"检查屏蔽按钮文本: {expected_button_text}"):
             assert user_page.get_block_button_text() == expected_button_text
+            user_page.assert_absent(user_page.UNBLOCK_BUTTON)
     
     @allure.story("发送私信")
     @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.resource(f"dialog:{USER_ID}", f"user:{USER_ID}")
     @pytest.mark.parametrize("case_id", ["message_valid_normal", "message_valid_max_length"])
-    def test_valid_message(self, logged_in_user, message_page, forum_test_data, case_id):
+    def test_valid_message(self, logged_in_user, message_page, database, forum_user_id, persistence_check,
+                           forum_test_data, case_id):
         """测试有效私信"""
         # 获取测试数据
         test_cases = {case["case_id"]: case for case in forum_test_data["message_tests"]}
@@ -314,16 +332,63 @@ class TestForum:
         with allure.step(f"输入私信: {content[:50]}..."):
             message_page.input_message(content)
         
+        if persistence_check != "ui":
+            # 记录发送前的最大ID，只匹配本次发送写入的私信
+            since_id = database.latest_id("dialog_message")
+        
         with allure.step("发送私信"):
-            message_page.click_send_button()
-            # 等待私信显示
-            time.sleep(2)
+            if persistence_check == "db":
+                message_page.click_send_button()
+            else:
+                latency = message_page.click_send_button_and_wait()
+                attach_latency("状态切换耗时", latency)
+        
+        if persistence_check != "ui":
+            with allure.step("检查私信是否写入数据库"):
+                elapsed = database.wait_for_message(forum_user_id, user_id, content, since_id)
+                attach_latency("写入耗时", elapsed, "超时未写入")
+                assert (elapsed is not None) == expected_success
+        
+        if persistence_check != "db":
+            with allure.step("检查私信是否发送成功"):
+                assert message_page.is_message_sent(content) == expected_success
+    
+    @allure.story("发送私信")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_message_received_by_peer(self, logged_in_user, message_page, browser_contexts, forum_account,
+                                      forum_user_id, peer_account, peer_login_session, forum_test_data):
+        """测试私信对方在同一浏览器的另一个隔离会话中收到私信"""
+        # 获取测试数据
+        test_cases = {case["case_id"]: case for case in forum_test_data["message_tests"]}
+        test_case = test_cases["message_valid_normal"]
         
-        with allure.step("检查私信是否发送成功"):
-            assert message_page.is_message_sent(content) == expected_success
+        # 测试数据
+        content = test_case["input"]["content"]
+        
+        # 创建新会话后原driver可能停留在新标签页，先完成当前账号的操作
+        with allure.step(f"打开与{peer_account.username}的私信页面"):
+            message_page.open_message_page(peer_account.user_id, peer_account.nickname)
+        
+        with allure.step(f"输入私信: {content[:50]}..."):
+            message_page.input_message(content)
+        
+        with allure.step("发送私信"):
+            latency = message_page.click_send_button_and_wait()
+            attach_latency("状态切换耗时", latency)
+            assert latency is not None, "超时未观察到新私信"
+        
+        with allure.step(f"在新的浏览器会话中登录{peer_account.username}"):
+            peer_session = browser_contexts.new_session(login_session=peer_login_session)
+        
+        with allure.step("检查对方收到私信"):
+            peer_message_page = peer_session.page(MessagePage).open_message_page(
+                forum_user_id, forum_account.nickname or forum_account.username
+            )
+            assert peer_message_page.is_message_sent(content), f"{peer_account.username}未收到私信"
     
     @allure.story("发送私信失败")
     @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.resource(f"dialog:{USER_ID}", f"user:{USER_ID}")
     def test_invalid_message(self, logged_in_user, message_page, forum_test_data):
         """测试无效私信 - 超长私信"""
         # 获取测试数据
@@ -342,10 +407,12 @@ class TestForum:
             message_page.open_message_page(user_id, nickname)
         
         with allure.step(f"输入超长私信: {content[:50]}..."):
-            message_page.input_message(content)
+            # 逐键输入，与用户一样受输入框的长度限制，快速填充会绕过maxlength
+            message_page.input_message(content, mode="keys")
         
         with allure.step("发送私信"):
             message_page.click_send_button()
         
         with allure.step(f"检查toast提示消息: {expected_toast}"):
-            assert message_page.check_toast_message(expected_toast) 
\ No newline at end of file
+            is_matched, actual_toast = message_page.check_toast_message(expected_toast)
+            assert is_matched, f"Toast消息不匹配。预期: {expected_toast}, 实际: {actual_toast or '无toast消息'}" 
\ No newline at end of file
@@ -0,0 +1,22 @@
+import allure
+
+@allure.epic("论坛测试")
+@allure.feature("登录功能")
+class TestLogin:
+    
+    @allure.story("有效登录")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_valid_login(self, login_page, home_page, forum_account):
+        """测试通过UI登录
+
+        其余论坛测试通过注入缓存的登录状态跳过UI登录，由本用例覆盖登录流程，
+        使用与登录会话缓存相同的测试账号
+        """
+        with allure.step("打开登录页面"):
+            login_page.open_login_page()
+        
+        with allure.step("输入用户名和密码并登录"):
+            login_page.login(forum_account.username, forum_account.password)
+        
+        with allure.step("检查登录状态"):
+            assert home_page.is_logged_in()
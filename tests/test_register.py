@@ -1,27 +1,6 @@
 import pytest
 import allure
 import time
-from retrying import retry
-
-# 定义重试装饰器，最多尝试3次，每次间隔2秒
-@retry(stop_max_attempt_number=3, wait_fixed=2000)
-def check_toast_with_retry(page, expected_message):
-    """带重试机制的toast检查
-    
-    Args:
-        page: 包含check_toast_message方法的页面对象
-        expected_message: 预期的toast消息
-        
-    Returns:
-        tuple: (是否匹配, 实际toast文本)
-        
-    Raises:
-        AssertionError: 如果三次尝试后仍未找到toast或toast不匹配预期
-    """
-    is_matched, actual_toast = page.check_toast_message(expected_message)
-    if not is_matched:
-        raise AssertionError(f"Toast消息不匹配。预期: {expected_message}, 实际: {actual_toast or '无toast消息'}")
-    return is_matched, actual_toast
 
 @allure.epic("论坛测试")
 @allure.feature("注册功能")
@@ -66,15 +45,12 @@ class TestRegister:
             register_page.click_register()
         
         with allure.step(f"检查toast提示消息"):
-            try:
-                is_matched, actual_toast = check_toast_with_retry(register_page, expected_toast)
-                allure.attach(f"预期toast: {expected_toast}\n实际toast: {actual_toast or '无toast消息'}", 
-                             name="Toast提示比较", 
-                             attachment_type=allure.attachment_type.TEXT)
-                assert is_matched == expected_success
-            except AssertionError as e:
-                allure.attach(str(e), name="Toast检查失败", attachment_type=allure.attachment_type.TEXT)
-                raise
+            is_matched, actual_toast = register_page.check_toast_message(expected_toast)
+            allure.attach(f"预期toast: {expected_toast}\n实际toast: {actual_toast or '无toast消息'}", 
+                         name="Toast提示比较", 
+                         attachment_type=allure.attachment_type.TEXT)
+            assert is_matched == expected_success, \
+                f"Toast消息不匹配。预期: {expected_toast}, 实际: {actual_toast or '无toast消息'}"
         
         if expected_redirect:
             with allure.step("等待重定向到主页"):
@@ -125,15 +101,11 @@ class TestRegister:
             register_page.click_register()
         
         with allure.step(f"检查toast提示消息"):
-            try:
-                is_matched, actual_toast = check_toast_with_retry(register_page, expected_toast)
-                allure.attach(f"预期toast: {expected_toast}\n实际toast: {actual_toast or '无toast消息'}", 
-                             name="Toast提示比较", 
-                             attachment_type=allure.attachment_type.TEXT)
-                assert is_matched
-            except AssertionError as e:
-                allure.attach(str(e), name="Toast检查失败", attachment_type=allure.attachment_type.TEXT)
-                raise
+            is_matched, actual_toast = register_page.check_toast_message(expected_toast)
+            allure.attach(f"预期toast: {expected_toast}\n实际toast: {actual_toast or '无toast消息'}", 
+                         name="Toast提示比较", 
+                         attachment_type=allure.attachment_type.TEXT)
+            assert is_matched, f"Toast消息不匹配。预期: {expected_toast}, 实际: {actual_toast or '无toast消息'}"
     
     @allure.story("密码无效")
     @allure.severity(allure.severity_level.NORMAL)
@@ -174,15 +146,11 @@ class TestRegister:
             register_page.click_register()
         
         with allure.step(f"检查toast提示消息"):
-            try:
-                is_matched, actual_toast = check_toast_with_retry(register_page, expected_toast)
-                allure.attach(f"预期toast: {expected_toast}\n实际toast: {actual_toast or '无toast消息'}", 
-                             name="Toast提示比较", 
-                             attachment_type=allure.attachment_type.TEXT)
-                assert is_matched
-            except AssertionError as e:
-                allure.attach(str(e), name="Toast检查失败", attachment_type=allure.attachment_type.TEXT)
-                raise
+            is_matched, actual_toast = register_page.check_toast_message(expected_toast)
+            allure.attach(f"预期toast: {expected_toast}\n实际toast: {actual_toast or '无toast消息'}", 
+                         name="Toast提示比较", 
+                         attachment_type=allure.attachment_type.TEXT)
+            assert is_matched, f"Toast消息不匹配。预期: {expected_toast}, 实际: {actual_toast or '无toast消息'}"
     
     @allure.story("密码不一致")
     @allure.severity(allure.severity_level.NORMAL)
@@ -220,15 +188,11 @@ class TestRegister:
             register_page.click_register()
         
         with allure.step(f"检查toast提示消息"):
-            try:
-                is_matched, actual_toast = check_toast_with_retry(register_page, expected_toast)
-                allure.attach(f"预期toast: {expected_toast}\n实际toast: {actual_toast or '无toast消息'}", 
-                             name="Toast提示比较", 
-                             attachment_type=allure.attachment_type.TEXT)
-                assert is_matched
-            except AssertionError as e:
-                allure.attach(str(e), name="Toast检查失败", attachment_type=allure.attachment_type.TEXT)
-                raise
+            is_matched, actual_toast = register_page.check_toast_message(expected_toast)
+            allure.attach(f"预期toast: {expected_toast}\n实际toast: {actual_toast or '无toast消息'}", 
+                         name="Toast提示比较", 
+                         attachment_type=allure.attachment_type.TEXT)
+            assert is_matched, f"Toast消息不匹配。预期: {expected_toast}, 实际: {actual_toast or '无toast消息'}"
     
     @allure.story("昵称无效")
     @allure.severity(allure.severity_level.NORMAL)
@@ -267,15 +231,11 @@ class TestRegister:
             register_page.click_register()
         
         with allure.step(f"检查toast提示消息"):
-            try:
-                is_matched, actual_toast = check_toast_with_retry(register_page, expected_toast)
-                allure.attach(f"预期toast: {expected_toast}\n实际toast: {actual_toast or '无toast消息'}", 
-                             name="Toast提示比较", 
-                             attachment_type=allure.attachment_type.TEXT)
-                assert is_matched
-            except AssertionError as e:
-                allure.attach(str(e), name="Toast检查失败", attachment_type=allure.attachment_type.TEXT)
-                raise
+            is_matched, actual_toast = register_page.check_toast_message(expected_toast)
+            allure.attach(f"预期toast: {expected_toast}\n实际toast: {actual_toast or '无toast消息'}", 
+                         name="Toast提示比较", 
+                         attachment_type=allure.attachment_type.TEXT)
+            assert is_matched, f"Toast消息不匹配。预期: {expected_toast}, 实际: {actual_toast or '无toast消息'}"
     
     @allure.story("表单验证")
     @allure.severity(allure.severity_level.MINOR)
@@ -0,0 +1,100 @@
+import allure
+from types import SimpleNamespace
+from utils.schedule_utils import DurationStore, DurationScheduling, resource_groups
+
+class StubConfig:
+    """只提供调度器需要的配置项"""
+
+    def __init__(self, numprocesses):
+        self.numprocesses = numprocesses
+
+    def getvalue(self, name):
+        if name == "tx":
+            return [f"{self.numprocesses}*popen"]
+        return None
+
+class StubNode:
+    """记录分配到的测试的worker"""
+
+    def __init__(self, name):
+        self.gateway = SimpleNamespace(id=name)
+        self.shutting_down = False
+        self.sent = []
+
+    def send_runtest_some(self, indices):
+        self.sent.extend(indices)
+
+    def shutdown(self):
+        self.shutting_down = True
+
+def make_scheduler(collection, durations, numprocesses=2):
+    """创建调度器并注册worker和测试收集结果"""
+    scheduler = DurationScheduling(StubConfig(numprocesses), durations=durations)
+    nodes = [StubNode(f"gw{i}") for i in range(numprocesses)]
+    for node in nodes:
+        scheduler.add_node(node)
+        scheduler.add_node_collection(node, collection)
+    return scheduler, nodes
+
+@allure.epic("测试框架")
+@allure.feature("并行调度")
+class TestDurationScheduling:
+
+    @allure.story("耗时记录")
+    def test_store_smooths_durations(self, tmp_path):
+        """测试耗时与历史值加权平均后保存"""
+        store = DurationStore(tmp_path / "durations.sqlite")
+        store.record({"test_a": 4.0})
+        store.record({"test_a": 2.0, "test_b": 1.0})
+
+        assert store.load() == {"test_a": 3.0, "test_b": 1.0}
+
+    @allure.story("长测试优先")
+    def test_longest_tests_start_first(self):
+        """测试首批分配的是预计耗时最长的测试"""
+        collection = ["test_fast", "test_slow", "test_medium", "test_unknown"]
+        durations = {"test_fast": 0.5, "test_slow": 30.0, "test_medium": 5.0}
+        scheduler, nodes = make_scheduler(collection, durations)
+
+        scheduler.schedule()
+
+        first = {collection[node.sent[0]] for node in nodes}
+        assert first == {"test_slow", "test_medium"}
+        assert sorted(index for node in nodes for index in node.sent) == [0, 1, 2, 3]
+
+    @allure.story("长测试优先")
+    def test_unknown_tests_use_median(self):
+        """测试没有历史记录的测试按中位数估算耗时"""
+        scheduler, _ = make_scheduler(["test_a"], {"x": 1.0, "y": 3.0, "z": 10.0})
+
+        assert scheduler.unit_weight({"test_a": False}) == 3.0
+
+    @allure.story("共享资源")
+    def test_resource_groups_merge_transitively(self):
+        """测试间接使用同一资源的测试也属于同一组，未声明资源的测试不分组"""
+        groups = resource_groups({
+            "test_follow": {"user:2"},
+            "test_message": {"dialog:2", "user:2"},
+            "test_reply": {"dialog:2"},
+            "test_like": {"thread:2"},
+            "test_comment": set(),
+        })
+
+        assert groups["test_follow"] == groups["test_message"] == groups["test_reply"]
+        assert groups["test_like"] != groups["test_follow"]
+        assert "test_comment" not in groups
+        assert all("@" not in name and "]" not in name for name in groups.values())
+
+    @allure.story("共享资源")
+    def test_grouped_tests_go_to_one_worker(self):
+        """测试同组的测试作为一个工作单元分配给同一个worker"""
+        collection = ["test_follow@res", "test_block@res", "test_a", "test_b[x@y]"]
+        durations = {"test_follow": 2.0, "test_block": 2.0, "test_a": 3.0, "test_b[x@y]": 1.0}
+        scheduler, nodes = make_scheduler(collection, durations)
+
+        scheduler.schedule()
+
+        grouped = next(node for node in nodes if 0 in node.sent)
+        assert 1 in grouped.sent
+        assert grouped.sent[:2] == [0, 1]
+        assert scheduler.unit_weight({"test_follow@res": False, "test_block@res": False}) == 4.0
@@ -0,0 +1,44 @@
+import fnmatch
+import allure
+from selenium.common.exceptions import InvalidCookieDomainException
+from utils.session_utils import LoginSessionCache
+from utils.webdriver_utils import WebDriverFactory
+
+class StubBlockingDriver:
+    """按浏览器配置屏蔽URL的假driver，被屏蔽的页面显示错误页，不能写入cookie和localStorage"""
+
+    def __init__(self, blocked_urls):
+        self.blocked_urls = blocked_urls
+        self.blocked = False
+        self.cookies = []
+        self.local_storage = {}
+
+    def get(self, url):
+        self.blocked = any(fnmatch.fnmatchcase(url, pattern) for pattern in self.blocked_urls)
+
+    def add_cookie(self, cookie):
+        if self.blocked:
+            raise InvalidCookieDomainException("invalid cookie domain")
+        self.cookies.append(cookie)
+
+    def execute_script(self, script, *args):
+        if not self.blocked:
+            self.local_storage.update(args[0])
+
+@allure.epic("测试框架")
+@allure.feature("登录会话缓存")
+class TestLoginSessionCache:
+
+    @allure.story("注入登录状态")
+    def test_inject_under_fast_profile(self, monkeypatch):
+        """测试fast配置下注入登录状态时打开的页面没有被屏蔽"""
+        monkeypatch.setattr(WebDriverFactory, "profile", "fast")
+        driver = StubBlockingDriver(WebDriverFactory.get_profile()["blocked_urls"])
+        cache = LoginSessionCache(login=None, is_logged_in=None)
+        cache.cookies = [{"name": "token", "value": "abc", "domain": "localhost"}]
+        cache.local_storage = {"accessToken": "abc"}
+
+        cache.inject(driver)
+
+        assert driver.cookies == [{"name": "token", "value": "abc"}]
+        assert driver.local_storage == {"accessToken": "abc"}
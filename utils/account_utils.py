@@ -0,0 +1,98 @@
+import copy
+import uuid
+
+class ForumAccount:
+    """论坛测试使用的账号，以及关注、屏蔽、私信的目标用户和点赞、评论的目标帖子
+
+    目标用户由账号池创建时记录其用户名，可以用与本账号相同的密码登录，用于多用户场景
+    """
+
+    def __init__(self, username, password, target_user_id=None, target_nickname=None, thread_id=None,
+                 user_id=None, nickname=None, target_username=None):
+        self.username = username
+        self.password = password
+        self.user_id = user_id
+        self.nickname = nickname
+        self.target_user_id = target_user_id
+        self.target_nickname = target_nickname
+        self.target_username = target_username
+        self.thread_id = thread_id
+
+    def apply_to(self, test_data):
+        """把测试数据中的目标用户和帖子替换为本账号专用的用户和帖子
+
+        Args:
+            test_data: forum_test_data.json的内容，不会被修改
+
+        Returns:
+            dict: 替换后的测试数据
+        """
+        replacements = {
+            "user_id": self.target_user_id,
+            "nickname": self.target_nickname,
+            "thread_id": self.thread_id,
+        }
+        test_data = copy.deepcopy(test_data)
+        for test_cases in test_data.values():
+            for test_case in test_cases:
+                test_input = test_case.get("input", {})
+                for key, value in replacements.items():
+                    if key in test_input and value is not None:
+                        test_input[key] = str(value)
+        return test_data
+
+class AccountPool:
+    """并行测试的账号池，每个xdist worker使用独立的账号、目标用户和帖子
+
+    账号和目标用户由模板用户复制而来(一条INSERT ... SELECT创建，密码与模板用户相同)，
+    帖子复制自模板帖子并归属于目标用户，避免多个worker共享服务端的登录会话、频率限制和关注、点赞等状态。
+    release时批量删除本池创建的所有用户，以及他们的帖子和回复。
+    """
+
+    def __init__(self, database, template_username, password, template_thread_id):
+        """初始化账号池
+
+        Args:
+            database: DatabaseUtils实例
+            template_username: 模板用户的用户名
+            password: 模板用户的密码
+            template_thread_id: 模板帖子ID
+        """
+        self.database = database
+        self.template_username = template_username
+        self.password = password
+        self.template_thread_id = template_thread_id
+        self.user_ids = []
+
+    def provision(self, worker_id):
+        """为worker创建账号、目标用户和帖子
+
+        Args:
+            worker_id: xdist的worker名称，如gw0
+
+        Returns:
+            ForumAccount: 新创建的账号
+        """
+        # 用户名和昵称不能超过15个字符，随机后缀避免与上次中断运行的残留数据冲突
+        prefix = f"{worker_id}_{uuid.uuid4().hex[:6]}"
+        username, target_username = f"{prefix}u", f"{prefix}t"
+        user_ids = self.database.clone_users(
+            self.template_username, [(username, username), (target_username, target_username)]
+        )
+        self.user_ids.extend(user_ids.values())
+        thread_id = self.database.clone_thread(self.template_thread_id, user_ids[target_username])
+        return ForumAccount(
+            username,
+            self.password,
+            target_user_id=user_ids[target_username],
+            target_nickname=target_username,
+            thread_id=thread_id,
+            user_id=user_ids[username],
+            nickname=username,
+            target_username=target_username
+        )
+
+    def release(self):
+        """批量删除本池创建的用户及其帖子"""
+        self.database.delete_users(self.user_ids)
+        self.user_ids = []
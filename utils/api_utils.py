@@ -0,0 +1,153 @@
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 本地论坛使用自签名证书
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+class ForumApiError(Exception):
+    """论坛API返回错误"""
+
+class ForumApiClient:
+    """Discuz! Q REST API客户端，用于快速准备和恢复测试前置状态
+
+    使用带连接池的requests.Session，复用到论坛的HTTPS连接。
+    """
+
+    # 接口路径
+    LOGIN = "apiv3/users/username.login"
+    USER = "apiv3/user"
+    THREAD_DETAIL = "apiv3/thread.detail"
+    FOLLOW_CREATE = "apiv3/follow.create"
+    FOLLOW_DELETE = "apiv3/follow.delete"
+    DENY_CREATE = "apiv3/user/deny"
+    DENY_DELETE = "apiv3/user/deny.delete"
+    POST_UPDATE = "apiv3/posts.update"
+
+    def __init__(self, base_url="https://localhost", timeout=5, pool_size=4):
+        """初始化API客户端
+
+        Args:
+            base_url: 论坛地址
+            timeout: 单个请求超时时间(秒)
+            pool_size: 连接池大小
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.access_token = None
+        self.session = requests.Session()
+        self.session.verify = False
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=2, backoff_factor=0.1)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, path, params=None, data=None):
+        """发送请求并返回响应中的Data字段"""
+        headers = {}
+        if self.access_token:
+            headers["Authorization"] = f"Bearer {self.access_token}"
+        response = self.session.request(
+            method,
+            f"{self.base_url}/{path}",
+            params=params,
+            json=data,
+            headers=headers,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        result = response.json()
+        if result.get("Code", 0) != 0:
+            raise ForumApiError(f"接口{path}返回错误: {result.get('Code')} {result.get('Message')}")
+        return result.get("Data")
+
+    def login(self, username, password):
+        """用户名密码登录，记录访问令牌"""
+        data = self.request("POST", self.LOGIN, data={"username": username, "password": password})
+        self.access_token = data["accessToken"]
+        return self
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+
+    # 关注
+    def is_following(self, user_id):
+        """判断是否已关注用户，follow为1(已关注)或2(互相关注)"""
+        data = self.request("GET", self.USER, params={"userId": user_id})
+        return data.get("follow", 0) in (1, 2)
+
+    def set_following(self, user_id, following):
+        """关注或取消关注用户"""
+        if following:
+            self.request("POST", self.FOLLOW_CREATE, data={"toUserId": int(user_id)})
+        else:
+            self.request("POST", self.FOLLOW_DELETE, data={"id": int(user_id), "type": 1})
+
+    # 屏蔽
+    def is_blocking(self, user_id):
+        """判断是否已屏蔽用户"""
+        data = self.request("GET", self.USER, params={"userId": user_id})
+        return bool(data.get("isDeny"))
+
+    def set_blocking(self, user_id, blocking):
+        """屏蔽或取消屏蔽用户"""
+        path = self.DENY_CREATE if blocking else self.DENY_DELETE
+        self.request("POST", path, data={"id": int(user_id)})
+
+    # 点赞
+    def get_thread(self, thread_id):
+        """获取帖子详情"""
+        return self.request("GET", self.THREAD_DETAIL, params={"threadId": thread_id})
+
+    def is_thread_liked(self, thread_id):
+        """判断是否已点赞帖子"""
+        return bool(self.get_thread(thread_id).get("isLike"))
+
+    def set_thread_liked(self, thread_id, liked):
+        """点赞或取消点赞帖子，点赞作用于帖子的首楼"""
+        post_id = self.get_thread(thread_id)["postId"]
+        self.request("POST", self.POST_UPDATE, data={
+            "id": post_id,
+            "data": {"attributes": {"isLiked": liked}}
+        })
+
+class ForumState:
+    """通过API设置测试前置状态，并在测试结束后恢复为原始状态"""
+
+    def __init__(self, client):
+        self.client = client
+        self._originals = []
+
+    def _ensure(self, getter, setter, key, value):
+        """将状态设置为指定值，并记录原始值用于恢复"""
+        original = getter(key)
+        self._originals.append((getter, setter, key, original))
+        if original != value:
+            setter(key, value)
+
+    def set_following(self, user_id, following):
+        """设置关注状态"""
+        self._ensure(self.client.is_following, self.client.set_following, user_id, following)
+        return self
+
+    def set_blocking(self, user_id, blocking):
+        """设置屏蔽状态"""
+        self._ensure(self.client.is_blocking, self.client.set_blocking, user_id, blocking)
+        return self
+
+    def set_thread_liked(self, thread_id, liked):
+        """设置点赞状态"""
+        self._ensure(self.client.is_thread_liked, self.client.set_thread_liked, thread_id, liked)
+        return self
+
+    def restore(self):
+        """按设置的相反顺序恢复原始状态"""
+        while self._originals:
+            getter, setter, key, original = self._originals.pop()
+            if getter(key) != original:
+                setter(key, original)
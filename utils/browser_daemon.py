@@ -0,0 +1,212 @@
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import subprocess
+from selenium.webdriver.common.utils import free_port, is_connectable
+from utils.webdriver_utils import WebDriverFactory, DriverBinaryResolver
+
+class BrowserDaemon:
+    """常驻浏览器，供本地开发时多次运行pytest复用
+
+    start在后台启动独立的驱动服务进程并创建浏览器会话，把服务地址和会话ID写入状态文件。
+    pytest使用--browser-daemon时通过状态文件连接到该会话，不再启动和关闭浏览器；
+    登录状态也保存在状态文件中，下次运行直接注入，不需要重新通过UI登录。
+    通过CDP注册的页面初始化脚本的标识也记录在状态文件中，每次运行连接时先移除上次注册的脚本，
+    再按本次运行的配置重新注册，脚本不会在多次运行之间累积。
+
+    用法：
+        python -m utils.browser_daemon start [--browser chrome] [--headless]
+        pytest tests/test_forum.py --browser-daemon -k follow
+        python -m utils.browser_daemon stop
+    """
+
+    STATE_FILE = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".browser_daemon.json"
+    )
+    # 等待驱动服务端口可连接的最长时间(秒)
+    START_TIMEOUT = 20
+
+    def __init__(self, state_file=None):
+        self.state_file = state_file or self.STATE_FILE
+
+    def load_state(self):
+        """读取状态文件，不存在时返回None"""
+        try:
+            with open(self.state_file, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_state(self, state):
+        """原子地写入状态文件"""
+        temp_file = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(temp_file, self.state_file)
+
+    def start(self, browser_name="chrome", headless=False):
+        """启动常驻浏览器，已在运行时直接返回其状态"""
+        if self.is_running():
+            return self.load_state()
+        self.stop()
+
+        browser_name = browser_name.lower()
+        port = free_port()
+        # 驱动服务进程脱离当前进程组，start命令退出后继续运行
+        process = subprocess.Popen(
+            [DriverBinaryResolver.resolve(browser_name), f"--port={port}"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        deadline = time.monotonic() + self.START_TIMEOUT
+        while not is_connectable(port):
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                raise RuntimeError(f"驱动服务未能在端口{port}上启动")
+            time.sleep(0.1)
+
+        service_url = f"http://localhost:{port}"
+        WebDriverFactory.remote_url = service_url
+        try:
+            driver = WebDriverFactory.create_driver(browser_name, headless)
+        except Exception:
+            process.kill()
+            raise
+        finally:
+            WebDriverFactory.remote_url = None
+
+        state = {
+            "browser": browser_name,
+            "pid": process.pid,
+            "service_url": service_url,
+            "session_id": driver.session_id,
+            "capabilities": driver.caps,
+            "login": None,
+            "init_scripts": WebDriverFactory.init_script_ids(driver),
+        }
+        self._save_state(state)
+        return state
+
+    def attach(self, reset_init_scripts=False):
+        """连接到常驻浏览器的会话，未启动时返回None
+
+        Args:
+            reset_init_scripts: 是否移除之前注册的页面初始化脚本，并按当前配置重新应用浏览器配置，
+                                pytest运行开始时使用
+        """
+        state = self.load_state()
+        if state is None:
+            return None
+        driver = WebDriverFactory.attach_session(
+            state["browser"], state["service_url"], state["session_id"], state["capabilities"]
+        )
+        if reset_init_scripts and WebDriverFactory.supports_cdp(driver):
+            WebDriverFactory.remove_init_scripts(driver, state.get("init_scripts", []))
+            WebDriverFactory.apply_cdp_profile(driver)
+            self.save_init_scripts(driver)
+        return driver
+
+    def save_init_scripts(self, driver):
+        """记录driver通过CDP注册的页面初始化脚本标识，供下次连接时移除"""
+        state = self.load_state()
+        identifiers = WebDriverFactory.init_script_ids(driver)
+        if state is None or state.get("init_scripts") == identifiers:
+            return
+        state["init_scripts"] = identifiers
+        self._save_state(state)
+
+    def is_running(self):
+        """判断驱动服务进程和浏览器会话是否仍然可用"""
+        state = self.load_state()
+        if state is None or not self._process_alive(state["pid"]):
+            return False
+        try:
+            self.attach().current_window_handle
+            return True
+        except Exception:
+            return False
+
+    def stop(self):
+        """关闭常驻浏览器和驱动服务，删除状态文件"""
+        state = self.load_state()
+        if state is None:
+            return
+        try:
+            self.attach().quit()
+        except Exception:
+            pass
+        if self._process_alive(state["pid"]):
+            os.kill(state["pid"], signal.SIGTERM)
+        try:
+            os.remove(self.state_file)
+        except FileNotFoundError:
+            pass
+
+    def save_login(self, login_session):
+        """保存登录会话缓存中的cookies和localStorage"""
+        state = self.load_state()
+        if state is None or login_session.cookies is None:
+            return
+        state["login"] = {
+            "cookies": login_session.cookies,
+            "local_storage": login_session.local_storage,
+            "last_checked": login_session.last_checked,
+        }
+        self._save_state(state)
+
+    def restore_login(self, login_session):
+        """将保存的登录状态恢复到登录会话缓存"""
+        state = self.load_state()
+        login = state and state.get("login")
+        if login:
+            login_session.cookies = login["cookies"]
+            login_session.local_storage = login["local_storage"]
+            login_session.last_checked = login["last_checked"]
+
+    @staticmethod
+    def _process_alive(pid):
+        """判断进程是否存在"""
+        try:
+            os.kill(pid, 0)
+            return True
+        except OSError:
+            return False
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="管理本地开发用的常驻浏览器")
+    parser.add_argument("command", choices=["start", "stop", "status"])
+    parser.add_argument("--browser", default="chrome", help="浏览器: chrome 或 firefox")
+    parser.add_argument("--headless", action="store_true", help="是否使用无头模式")
+    parser.add_argument("--browser-profile", default="fast", choices=list(WebDriverFactory.PROFILES),
+                        help="浏览器配置，应与pytest的--browser-profile一致")
+    parser.add_argument("--page-load-strategy", default="eager", choices=["normal", "eager", "none"],
+                        help="页面加载策略，应与pytest的--page-load-strategy一致")
+    parser.add_argument("--network-monitor", default="auto", choices=["auto", "cdp", "hook"],
+                        help="等待网络空闲的方式，应与pytest的--network-monitor一致")
+    args = parser.parse_args(argv)
+    WebDriverFactory.profile = args.browser_profile
+    WebDriverFactory.page_load_strategy = args.page_load_strategy
+    WebDriverFactory.network_monitor = args.network_monitor
+
+    daemon = BrowserDaemon()
+    if args.command == "start":
+        state = daemon.start(args.browser, args.headless)
+        print(f"常驻浏览器已启动: {state['browser']} {state['service_url']} 会话 {state['session_id']}")
+    elif args.command == "stop":
+        daemon.stop()
+        print("常驻浏览器已关闭")
+    elif daemon.is_running():
+        state = daemon.load_state()
+        print(f"运行中: {state['browser']} {state['service_url']} 会话 {state['session_id']}")
+    else:
+        print("未运行")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
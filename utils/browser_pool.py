@@ -0,0 +1,170 @@
+import threading
+from selenium.common.exceptions import WebDriverException
+from urllib3.exceptions import HTTPError
+from utils.webdriver_utils import WebDriverFactory
+from utils.network_utils import NetworkMonitor
+
+# 浏览器或驱动服务崩溃时可能抛出的异常，驱动进程退出时请求会以urllib3异常失败
+BROWSER_ERRORS = (WebDriverException, HTTPError, OSError)
+
+class BrowserPool:
+    """浏览器池，在同一个worker进程内复用已启动的浏览器
+
+    每个测试从池中借出一个浏览器，归还时清理cookies、localStorage、
+    sessionStorage和多余的标签页。浏览器使用次数达到上限或发生崩溃时会被回收重建。
+    """
+
+    # 清理当前页面源下的前端存储
+    CLEAR_STORAGE_SCRIPT = """
+        try { window.localStorage.clear(); } catch (e) {}
+        try { window.sessionStorage.clear(); } catch (e) {}
+    """
+
+    # 归还时清理存储的页面源，Storage.clearDataForOrigin需要具体的源
+    ORIGINS = ("https://localhost",)
+    # 清理各个源时打开的同源轻量页面，sessionStorage只能由该源页面中的脚本清理；
+    # 该地址不能被浏览器配置的blocked_urls屏蔽
+    CLEAR_PATH = "favicon.ico"
+
+    def __init__(self, browser_name="chrome", headless=False, max_uses=20, max_idle=1, daemon=None,
+                 origins=None):
+        """初始化浏览器池参数
+
+        Args:
+            browser_name: 浏览器名称
+            headless: 是否使用无头模式
+            max_uses: 单个浏览器最多被借出的次数，超过后关闭并重建
+            max_idle: 池中最多保留的空闲浏览器数量
+            daemon: 常驻浏览器(BrowserDaemon)，设置后始终借出该浏览器，归还时只重置状态、不关闭
+            origins: 归还时清理cookies和前端存储的页面源，默认为ORIGINS
+        """
+        self.browser_name = browser_name.lower()
+        self.headless = headless
+        self.max_uses = max_uses
+        self.max_idle = max_idle
+        self._idle = []
+        self._uses = {}
+        self._lock = threading.Lock()
+        self.daemon = daemon
+        self._daemon_driver = None
+        self.origins = tuple(origins or self.ORIGINS)
+
+    def acquire(self):
+        """从池中借出一个浏览器，没有可用浏览器时新建"""
+        if self.daemon is not None:
+            return self._acquire_daemon()
+
+        while True:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                break
+            if self.is_alive(driver):
+                with self._lock:
+                    self._uses[driver] += 1
+                return driver
+            self.discard(driver)
+
+        driver = WebDriverFactory.create_driver(self.browser_name, self.headless)
+        with self._lock:
+            self._uses[driver] = 1
+        return driver
+
+    def _acquire_daemon(self):
+        """借出常驻浏览器，首次借出时清理上次运行残留的状态"""
+        if self._daemon_driver is None:
+            driver = self.daemon.attach(reset_init_scripts=True)
+            if driver is None or not self.is_alive(driver):
+                raise RuntimeError("常驻浏览器未运行，请先执行: python -m utils.browser_daemon start")
+            self.reset(driver)
+            self._daemon_driver = driver
+        return self._daemon_driver
+
+    def release(self, driver, broken=False):
+        """归还浏览器，重置状态后放回池中
+
+        Args:
+            driver: 借出的WebDriver实例
+            broken: 为True时直接回收，不再复用
+        """
+        if driver is self._daemon_driver:
+            # 常驻浏览器不关闭，重置失败时下次借出重新连接
+            try:
+                self.reset(driver)
+            except BROWSER_ERRORS:
+                self._daemon_driver = None
+                return
+            # 测试中注册的初始化脚本留在常驻浏览器中，记录标识供下次运行移除
+            self.daemon.save_init_scripts(driver)
+            return
+
+        if broken or self._uses.get(driver, 0) >= self.max_uses:
+            self.discard(driver)
+            return
+
+        try:
+            self.reset(driver)
+        except BROWSER_ERRORS:
+            # 浏览器已崩溃或处于异常状态
+            self.discard(driver)
+            return
+
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(driver)
+                return
+        self.discard(driver)
+
+    def reset(self, driver):
+        """重置浏览器状态：关闭多余标签页，清理cookies、前端存储和未读取的网络事件"""
+        handles = driver.window_handles
+        if not handles:
+            # 所有标签页都已关闭，由调用方回收浏览器
+            raise WebDriverException("浏览器没有可用的标签页")
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        # delete_all_cookies和清理存储的脚本只作用于当前页面所在的源，测试结束时页面可能不在论坛，
+        # 因此逐个打开论坛各个源下的页面再清理
+        for origin in self.origins:
+            driver.get(f"{origin}/{self.CLEAR_PATH}")
+            driver.execute_script(self.CLEAR_STORAGE_SCRIPT)
+            driver.delete_all_cookies()
+        if WebDriverFactory.supports_cdp(driver):
+            # 清理所有域的cookies，以及论坛各个源下的IndexedDB
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            for origin in self.origins:
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                    "origin": origin,
+                    "storageTypes": "local_storage,indexeddb"
+                })
+
+        driver.get("about:blank")
+        NetworkMonitor.discard_events(driver)
+
+    @staticmethod
+    def is_alive(driver):
+        """判断浏览器会话是否仍然可用"""
+        try:
+            driver.current_window_handle
+            return True
+        except BROWSER_ERRORS:
+            return False
+
+    def discard(self, driver):
+        """关闭并回收浏览器"""
+        with self._lock:
+            self._uses.pop(driver, None)
+        try:
+            WebDriverFactory.quit_driver(driver)
+        except BROWSER_ERRORS:
+            pass
+
+    def close(self):
+        """关闭池中所有浏览器"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self.discard(driver)
@@ -0,0 +1,87 @@
+import warnings
+import pymysql
+import pytest
+
+class DatabaseCleanup:
+    """按自增ID水位自动清理测试数据的pytest插件
+
+    第一个使用database fixture的测试开始前记录各数据表的最大ID，结束时分批删除水位之后新增的
+    用户、帖子、回复和私信，只运行不访问数据库的测试时不会连接数据库。
+    session模式下xdist的worker各自记录水位，通过workeroutput传回主进程，主进程按表取最小值，
+    所有worker结束后统一清理；module模式在模块最后一个测试结束后清理，只能串行运行。
+    """
+
+    # worker向主进程传递水位时使用的workeroutput键
+    WORKEROUTPUT_KEY = "forumtest_db_watermarks"
+
+    def __init__(self, database, scope="session", batch_size=1000):
+        """初始化清理插件
+
+        Args:
+            database: DatabaseUtils实例
+            scope: 清理范围，session或module
+            batch_size: 每条DELETE删除的最大行数
+        """
+        self.database = database
+        self.scope = scope
+        self.batch_size = batch_size
+        self.watermarks = None
+        self._recorded = False
+
+    def record(self):
+        """记录水位，数据库不可用时跳过本次清理"""
+        self._recorded = True
+        try:
+            self.watermarks = self.database.record_watermarks()
+        except pymysql.MySQLError as e:
+            warnings.warn(f"记录数据清理水位失败，不自动清理测试数据: {str(e)}")
+            self.watermarks = None
+
+    def merge(self, watermarks):
+        """合并worker记录的水位，每个表取最小值"""
+        if self.watermarks is None:
+            self.watermarks = dict(watermarks)
+            return
+        for table, watermark in watermarks.items():
+            self.watermarks[table] = min(self.watermarks.get(table, watermark), watermark)
+
+    def cleanup(self):
+        """删除水位之后新增的数据"""
+        self._recorded = False
+        if self.watermarks is None:
+            return
+        try:
+            self.database.delete_above_watermarks(self.watermarks, self.batch_size)
+        except pymysql.MySQLError as e:
+            warnings.warn(f"清理测试数据失败: {str(e)}")
+        finally:
+            self.watermarks = None
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item):
+        """在fixture创建测试数据之前记录水位"""
+        if not self._recorded and "database" in item.fixturenames:
+            self.record()
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        """主进程收集worker记录的水位"""
+        watermarks = getattr(node, "workeroutput", {}).get(self.WORKEROUTPUT_KEY)
+        if watermarks is not None:
+            self.merge(watermarks)
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session):
+        if hasattr(session.config, "workerinput"):
+            if self.watermarks is not None:
+                session.config.workeroutput[self.WORKEROUTPUT_KEY] = self.watermarks
+        elif self.scope == "session":
+            self.cleanup()
+        self.database.close()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        """模块最后一个测试及其fixture清理完成后删除数据"""
+        yield
+        if self.scope == "module" and (nextitem is None or nextitem.module is not item.module):
+            self.cleanup()
@@ -0,0 +1,123 @@
+import time
+from utils.webdriver_utils import WebDriverFactory
+
+class ContextDriver:
+    """绑定到某个标签页的driver代理
+
+    多个浏览器上下文共用同一个WebDriver会话，每次访问driver的属性或方法前，
+    读取会话当前的标签页，不在本标签页时先切换过去。页面对象或其他代码直接通过原driver切换过
+    标签页也不影响判断。页面对象可以像使用普通driver一样使用它。
+    """
+
+    def __init__(self, driver, handle, context_id=None):
+        self._driver = driver
+        self.handle = handle
+        self.context_id = context_id
+
+    def __getattr__(self, name):
+        self.activate()
+        return getattr(self._driver, name)
+
+    def activate(self):
+        """将WebDriver会话切换到本标签页"""
+        if self._driver.current_window_handle != self.handle:
+            self._driver.switch_to.window(self.handle)
+
+class BrowserSession:
+    """一个独立的浏览器会话，拥有自己的cookies和前端存储"""
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def page(self, page_class):
+        """创建绑定到本会话的页面对象"""
+        return page_class(self.driver)
+
+    def login(self, login_session):
+        """为本会话应用登录会话缓存(LoginSessionCache)中的登录状态，缓存为空或过期时通过UI登录"""
+        login_session.apply(self.driver)
+        return self
+
+class BrowserContextManager:
+    """在同一个浏览器进程中创建多个相互隔离的会话，用于需要多个用户同时在线的场景
+
+    Chrome通过CDP的Target.createBrowserContext创建独立的浏览器上下文，每个上下文有独立的
+    cookies和存储，只新开一个标签页，不需要启动新的浏览器。Firefox不支持CDP，为每个额外会话
+    单独启动浏览器。
+    使用多个会话后应通过各会话的页面对象操作，原driver对应default会话；创建新会话后原driver
+    可能停留在新会话的标签页，直接使用原driver的页面对象只应在创建新会话之前。
+    同一浏览器中各标签页共用performance日志，多个会话同时等待网络空闲时可能相互影响。
+    """
+
+    def __init__(self, driver, browser_name="chrome", headless=False):
+        """初始化会话管理器
+
+        Args:
+            driver: 已启动的WebDriver，其当前标签页作为default会话
+            browser_name: 浏览器名称
+            headless: Firefox单独启动浏览器时是否使用无头模式
+        """
+        self.driver = driver
+        self.browser_name = browser_name.lower()
+        self.headless = headless
+        self.use_cdp = WebDriverFactory.supports_cdp(driver)
+        self._default_handle = driver.current_window_handle
+        self.default = BrowserSession(
+            ContextDriver(driver, self._default_handle) if self.use_cdp else driver
+        )
+        self._sessions = []
+
+    def new_session(self, login_session=None, timeout=5):
+        """创建一个新的隔离会话
+
+        Args:
+            login_session: 登录会话缓存(LoginSessionCache)，指定时新会话以该缓存的账号登录
+            timeout: 等待新标签页出现在WebDriver会话中的超时时间
+
+        Returns:
+            BrowserSession: 新会话
+        """
+        session = self._create_session(timeout)
+        self._sessions.append(session)
+        if login_session is not None:
+            session.login(login_session)
+        return session
+
+    def _create_session(self, timeout):
+        """创建新会话的浏览器上下文或浏览器"""
+        if not self.use_cdp:
+            return BrowserSession(WebDriverFactory.create_driver(self.browser_name, self.headless))
+
+        context_id = self.driver.execute_cdp_cmd(
+            "Target.createBrowserContext", {}
+        )["browserContextId"]
+        target_id = self.driver.execute_cdp_cmd(
+            "Target.createTarget", {"url": "about:blank", "browserContextId": context_id}
+        )["targetId"]
+
+        # ChromeDriver的窗口句柄即CDP的targetId，新标签页需要一点时间才会出现在会话中
+        deadline = time.monotonic() + timeout
+        while target_id not in self.driver.window_handles:
+            if time.monotonic() > deadline:
+                self.driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+                raise TimeoutError(f"新的浏览器上下文未在{timeout}秒内就绪")
+            time.sleep(0.05)
+
+        driver = ContextDriver(self.driver, target_id, context_id)
+        # CDP命令只作用于当前标签页，新上下文的标签页需要重新应用浏览器配置和原driver已注册的初始化脚本
+        WebDriverFactory.apply_cdp_profile(driver)
+        WebDriverFactory.install_init_scripts(driver, WebDriverFactory.installed_init_scripts(self.driver))
+        return BrowserSession(driver)
+
+    def close(self):
+        """关闭所有额外会话，并将WebDriver切换回default会话的标签页"""
+        sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            if not self.use_cdp:
+                WebDriverFactory.quit_driver(session.driver)
+                continue
+            self.driver.execute_cdp_cmd(
+                "Target.disposeBrowserContext", {"browserContextId": session.driver.context_id}
+            )
+        if self.use_cdp:
+            self.driver.switch_to.window(self._default_handle)
@@ -1,63 +1,302 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 import pymysql
 from pymysql.cursors import DictCursor
 
+# 数据库连接配置，可通过环境变量覆盖
+db_config = {
+    "host": os.environ.get("DB_HOST", "localhost"),
+    "port": int(os.environ.get("DB_PORT", "3307")),
+    "user": os.environ.get("DB_USER", "root"),
+    "password": os.environ.get("DB_PASSWORD", "root"),
+    "database": os.environ.get("DB_NAME", "root"),
+    "charset": os.environ.get("DB_CHARSET", "utf8mb4"),
+    "pool_size": int(os.environ.get("DB_POOL_SIZE", "4")),
+    "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+}
+
+# 连接已断开或不可用时pymysql抛出的异常，发生时连接不再放回池中
+CONNECTION_ERRORS = (pymysql.err.OperationalError, pymysql.err.InterfaceError)
+
+class ConnectionPool:
+    """有上限的数据库连接池
+
+    连接按需创建，最多size个，用完后放回池中复用；池中连接空闲超过PING_INTERVAL秒后，
+    借出前先用ping(reconnect=True)校验，MySQL的wait_timeout断开的连接会自动重连。
+    同一线程嵌套借出时复用该线程已借出的连接(线程亲和)，LAST_INSERT_ID等依赖会话的查询
+    需在同一个connection()块内执行。进程ID变化(fork出的子进程)时丢弃继承来的连接。
+    """
+
+    # 空闲超过该时间(秒)的连接在借出前校验
+    PING_INTERVAL = 30
+
+    def __init__(self, size=4, timeout=10, connect=pymysql.connect, **connect_kwargs):
+        """初始化连接池
+
+        Args:
+            size: 最大连接数
+            timeout: 连接全部借出时等待归还的最长时间(秒)
+            connect: 创建连接的函数
+            connect_kwargs: 传给connect的连接参数
+        """
+        self.size = size
+        self.timeout = timeout
+        self._connect = connect
+        self.connect_kwargs = connect_kwargs
+        self._idle = []
+        self._created = 0
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        """在fork出的子进程中丢弃父进程的连接，不关闭以免影响父进程"""
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._idle = []
+            self._created = 0
+            self._local = threading.local()
+
+    def checkout(self):
+        """借出一个连接，全部借出时等待归还
+
+        Raises:
+            TimeoutError: 超过timeout仍没有可用连接
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            self._check_pid()
+            while not self._idle and self._created >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"数据库连接池的{self.size}个连接均已借出")
+                self._condition.wait(remaining)
+            if self._idle:
+                connection, checked_in = self._idle.pop()
+            else:
+                connection, checked_in = None, None
+                self._created += 1
+
+        try:
+            if connection is None:
+                connection = self._connect(**self.connect_kwargs)
+            elif time.monotonic() - checked_in >= self.PING_INTERVAL:
+                connection.ping(reconnect=True)
+        except Exception:
+            self._discard(connection)
+            raise
+        return connection
+
+    def checkin(self, connection, broken=False):
+        """归还连接，broken为True时关闭连接"""
+        with self._condition:
+            if os.getpid() != self._pid:
+                return
+            if broken or not connection.open:
+                self._discard(connection)
+                return
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def _discard(self, connection):
+        """关闭连接并释放名额"""
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        with self._condition:
+            self._created -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """借出连接，块结束后归还；当前线程已借出连接时直接复用"""
+        pinned = getattr(self._local, "connection", None)
+        if pinned is not None:
+            yield pinned
+            return
+
+        connection = self.checkout()
+        self._local.connection = connection
+        broken = False
+        try:
+            yield connection
+        except CONNECTION_ERRORS:
+            broken = True
+            raise
+        finally:
+            self._local.connection = None
+            self.checkin(connection, broken)
+
+    def close(self):
+        """关闭池中所有空闲连接，借出中的连接归还后仍可继续使用"""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        for connection, _ in idle:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
 class DatabaseUtils:
     """数据库工具类，用于操作MySQL数据库"""
+
+    # 按水位自动清理的数据表，子表在前，按外键依赖顺序删除：(表名, 比较列, 水位所属的表)
+    # 点赞(post_user)、关注(user_follow)、屏蔽(deny_users)等关系表按两端关联的ID删除
+    CLEANUP_TABLES = [
+        ("dialog_message", "id", "dialog_message"),
+        ("dialog", "id", "dialog"),
+        ("post_user", "post_id", "posts"),
+        ("post_user", "user_id", "users"),
+        ("posts", "id", "posts"),
+        ("threads", "id", "threads"),
+        ("user_follow", "from_user_id", "users"),
+        ("user_follow", "to_user_id", "users"),
+        ("deny_users", "user_id", "users"),
+        ("deny_users", "deny_user_id", "users"),
+        ("group_user", "user_id", "users"),
+        ("users", "id", "users"),
+    ]
+    # 删除用户时CLEANUP_TABLES中各表关联这些用户的数据，{ids}为用户ID的占位符列表
+    USER_DATA_CONDITIONS = {
+        "dialog_message": (
+            "user_id IN ({ids}) OR dialog_id IN "
+            "(SELECT id FROM dialog WHERE sender_user_id IN ({ids}) OR recipient_user_id IN ({ids}))"
+        ),
+        "dialog": "sender_user_id IN ({ids}) OR recipient_user_id IN ({ids})",
+        "post_user": (
+            "user_id IN ({ids}) OR post_id IN (SELECT id FROM posts WHERE user_id IN ({ids}) "
+            "OR thread_id IN (SELECT id FROM threads WHERE user_id IN ({ids})))"
+        ),
+        "posts": "user_id IN ({ids}) OR thread_id IN (SELECT id FROM threads WHERE user_id IN ({ids}))",
+        "threads": "user_id IN ({ids})",
+        "user_follow": "from_user_id IN ({ids}) OR to_user_id IN ({ids})",
+        "deny_users": "user_id IN ({ids}) OR deny_user_id IN ({ids})",
+        "group_user": "user_id IN ({ids})",
+        "users": "id IN ({ids})",
+    }
+    # 用户ID、帖子ID查询缓存的最大条目数
+    ID_CACHE_SIZE = 256
+    # 建议为threads.title添加的前缀索引，按标题查询帖子时不再全表扫描
+    TITLE_INDEX_SQL = "CREATE INDEX idx_threads_title ON threads (title(64))"
+    # 轮询持久化数据的初始间隔和最大间隔(秒)，每次未查到时间隔翻倍
+    POLL_INITIAL_DELAY = 0.01
+    POLL_MAX_DELAY = 0.2
     
-    def __init__(self, host="localhost", port=3307, user="root", password="root", database="root", charset="utf8mb4"):
-        """初始化数据库连接参数"""
-        self.host = host
-        self.port = port
-        self.user = user
-        self.password = password
-        self.database = database
-        self.charset = charset
-        self.connection = None
-    
-    def connect(self):
-        """连接数据库"""
-        if self.connection is None:
-            self.connection = pymysql.connect(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-                charset=self.charset,
-                cursorclass=DictCursor
-            )
-        return self.connection
+    def __init__(self, host=None, port=None, user=None, password=None, database=None, charset=None,
+                 pool_size=None, pool_timeout=None):
+        """初始化数据库连接参数，未指定的参数使用db_config中的配置"""
+        self.host = host or db_config["host"]
+        self.port = port or db_config["port"]
+        self.user = user or db_config["user"]
+        self.password = password if password is not None else db_config["password"]
+        self.database = database or db_config["database"]
+        self.charset = charset or db_config["charset"]
+        # 开启自动提交，避免复用的连接停留在旧的一致性快照上，读不到其他连接新写入的数据
+        self.pool = ConnectionPool(
+            size=pool_size or db_config["pool_size"],
+            timeout=pool_timeout or db_config["pool_timeout"],
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            charset=self.charset,
+            cursorclass=DictCursor,
+            autocommit=True
+        )
+        self._columns = {}
+        self._id_cache = OrderedDict()
+        self._id_cache_lock = threading.Lock()
     
     def close(self):
-        """关闭数据库连接"""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
+        """关闭连接池中的空闲连接"""
+        self.pool.close()
     
     def execute_query(self, sql, params=None):
         """执行查询SQL，返回查询结果"""
-        connection = self.connect()
-        try:
+        with self.pool.connection() as connection:
             with connection.cursor() as cursor:
                 cursor.execute(sql, params or ())
-                result = cursor.fetchall()
-                return result
-        finally:
-            pass  # 不关闭连接，重复使用
+                return cursor.fetchall()
     
     def execute_update(self, sql, params=None):
         """执行更新SQL，返回影响的行数"""
-        connection = self.connect()
-        try:
+        with self.pool.connection() as connection:
             with connection.cursor() as cursor:
                 rows = cursor.execute(sql, params or ())
                 connection.commit()
                 return rows
-        finally:
-            pass  # 不关闭连接，重复使用
     
+    def wait_for_row(self, sql, params=None, timeout=5):
+        """轮询直到查询返回结果，间隔从POLL_INITIAL_DELAY开始翻倍，不超过POLL_MAX_DELAY
+
+        Returns:
+            float: 查到结果的耗时(秒)，超时返回None
+        """
+        start = time.monotonic()
+        delay = self.POLL_INITIAL_DELAY
+        while True:
+            if self.execute_query(sql, params):
+                return time.monotonic() - start
+            remaining = start + timeout - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, self.POLL_MAX_DELAY)
+
+    @staticmethod
+    def content_hash(content):
+        """内容的MD5，与MySQL的MD5()结果一致"""
+        return hashlib.md5(content.encode("utf-8")).hexdigest()
+
+    def latest_id(self, table):
+        """数据表当前的最大ID，空表为0，用于在写入前记录起点"""
+        return self.execute_query(f"SELECT COALESCE(MAX(id), 0) AS id FROM `{table}`")[0]["id"]
+
+    def wait_for_comment(self, thread_id, user_id, content, since_id=0, timeout=5):
+        """等待评论写入posts表
+
+        通过thread_id索引定位帖子的回复，只比较内容的MD5，不传输长文本
+
+        Args:
+            since_id: 提交前posts表的最大ID(latest_id)，只匹配之后写入的回复，
+                      避免查到之前运行残留的相同内容
+
+        Returns:
+            float: 写入的耗时(秒)，超时返回None
+        """
+        sql = (
+            "SELECT id FROM posts WHERE thread_id = %s AND user_id = %s AND is_first = 0 "
+            "AND id > %s AND MD5(content) = %s LIMIT 1"
+        )
+        return self.wait_for_row(sql, (thread_id, user_id, since_id, self.content_hash(content)), timeout)
+
+    def wait_for_message(self, sender_id, recipient_id, content, since_id=0, timeout=5):
+        """等待私信写入dialog_message表
+
+        Args:
+            since_id: 发送前dialog_message表的最大ID(latest_id)，只匹配之后写入的私信
+
+        Returns:
+            float: 写入的耗时(秒)，超时返回None
+        """
+        sql = (
+            "SELECT m.id FROM dialog_message AS m JOIN dialog AS d ON m.dialog_id = d.id "
+            "WHERE m.user_id = %s AND %s IN (d.sender_user_id, d.recipient_user_id) "
+            "AND m.id > %s AND MD5(m.message_text) = %s LIMIT 1"
+        )
+        return self.wait_for_row(sql, (sender_id, recipient_id, since_id, self.content_hash(content)), timeout)
+
     def delete_user(self, username=None, nickname=None):
         """根据用户名或昵称删除用户"""
+        self.invalidate_ids("users")
         if username:
             sql = "DELETE FROM users WHERE username = %s"
             return self.execute_update(sql, (username,))
@@ -66,26 +305,110 @@ class DatabaseUtils:
             return self.execute_update(sql, (nickname,))
         return 0
     
+    def lookup_ids(self, table, column, values, where="", params=()):
+        """按列值批量查询ID，未缓存的值用一条IN查询解析
+
+        同一个值对应多行时取ID最大(最新)的一行。结果按LRU缓存，查不到的值不缓存；
+        创建或删除相关数据后需调用invalidate_ids。
+
+        Args:
+            table: 表名
+            column: 查询的列
+            values: 列值列表
+            where: 追加的查询条件，如" AND created_at >= %s"
+            params: 追加条件的参数
+
+        Returns:
+            dict: 列值 -> ID，查不到的值不在结果中
+        """
+        ids = {}
+        missing = []
+        with self._id_cache_lock:
+            for value in dict.fromkeys(values):
+                key = (table, column, where, tuple(params), value)
+                if key in self._id_cache:
+                    self._id_cache.move_to_end(key)
+                    ids[value] = self._id_cache[key]
+                else:
+                    missing.append(value)
+        if not missing:
+            return ids
+
+        placeholders = ", ".join(["%s"] * len(missing))
+        rows = self.execute_query(
+            f"SELECT `{column}` AS value, MAX(id) AS id FROM `{table}` "
+            f"WHERE `{column}` IN ({placeholders}){where} GROUP BY `{column}`",
+            [*missing, *params]
+        )
+        with self._id_cache_lock:
+            for row in rows:
+                ids[row["value"]] = row["id"]
+                self._id_cache[(table, column, where, tuple(params), row["value"])] = row["id"]
+            while len(self._id_cache) > self.ID_CACHE_SIZE:
+                self._id_cache.popitem(last=False)
+        return ids
+
+    def invalidate_ids(self, table=None):
+        """清除ID查询缓存，table为None时清除所有表"""
+        with self._id_cache_lock:
+            if table is None:
+                self._id_cache.clear()
+                return
+            for key in [key for key in self._id_cache if key[0] == table]:
+                del self._id_cache[key]
+
+    def get_user_ids(self, values, by="username"):
+        """批量查询用户ID
+
+        Args:
+            values: 用户名或昵称列表
+            by: username或nickname
+
+        Returns:
+            dict: 用户名或昵称 -> 用户ID
+        """
+        return self.lookup_ids("users", by, values)
+
+    def get_thread_ids(self, titles, created_after=None):
+        """按标题批量查询帖子ID
+
+        threads.title默认没有索引，建议执行TITLE_INDEX_SQL(见ensure_title_index)，
+        或用created_after把查询限定在最近创建的帖子中。
+
+        Args:
+            titles: 标题列表
+            created_after: 只查询该时间之后创建的帖子，datetime或"YYYY-MM-DD HH:MM:SS"
+
+        Returns:
+            dict: 标题 -> 帖子ID
+        """
+        if created_after is None:
+            return self.lookup_ids("threads", "title", titles)
+        return self.lookup_ids("threads", "title", titles, " AND created_at >= %s", (created_after,))
+
+    def ensure_title_index(self):
+        """为threads.title创建TITLE_INDEX_SQL中的索引，已有标题索引时跳过
+
+        Returns:
+            bool: 是否新建了索引
+        """
+        if self.execute_query("SHOW INDEX FROM threads WHERE Column_name = 'title'"):
+            return False
+        self.execute_update(self.TITLE_INDEX_SQL)
+        return True
+
     def get_user_id(self, username=None, nickname=None):
         """根据用户名或昵称获取用户ID"""
         if username:
-            sql = "SELECT id FROM users WHERE username = %s"
-            result = self.execute_query(sql, (username,))
+            return self.get_user_ids([username]).get(username)
         elif nickname:
-            sql = "SELECT id FROM users WHERE nickname = %s"
-            result = self.execute_query(sql, (nickname,))
-        else:
-            return None
-        
-        if result:
-            return result[0]['id']
+            return self.get_user_ids([nickname], by="nickname").get(nickname)
         return None
     
-    def get_thread_id(self, title=None, user_id=None):
+    def get_thread_id(self, title=None, user_id=None, created_after=None):
         """根据标题或用户ID获取帖子ID"""
         if title:
-            sql = "SELECT id FROM threads WHERE title = %s"
-            result = self.execute_query(sql, (title,))
+            return self.get_thread_ids([title], created_after).get(title)
         elif user_id:
             sql = "SELECT id FROM threads WHERE user_id = %s ORDER BY created_at DESC LIMIT 1"
             result = self.execute_query(sql, (user_id,))
@@ -96,5 +419,166 @@ class DatabaseUtils:
             return result[0]['id']
         return None
 
+    def table_columns(self, table):
+        """获取数据表的列名、(主键以外的)唯一索引列和NOT NULL列，按表缓存"""
+        if table not in self._columns:
+            rows = self.execute_query(f"SHOW COLUMNS FROM `{table}`")
+            columns = [row["Field"] for row in rows]
+            required = {row["Field"] for row in rows if row["Null"] == "NO"}
+            unique = {
+                row["Column_name"]
+                for row in self.execute_query(f"SHOW INDEX FROM `{table}` WHERE Non_unique = 0")
+                if row["Key_name"] != "PRIMARY"
+            }
+            self._columns[table] = (columns, unique, required)
+        return self._columns[table]
+
+    def clone_rows(self, table, template_where, template_params, rows):
+        """以模板行为基础，用一条INSERT ... SELECT复制出多行
+
+        未覆盖的唯一索引列不能沿用模板行的值：允许NULL的列置为NULL，NOT NULL的列用UUID_SHORT()
+        生成不重复的数字(列类型需能容纳20位数字)。自增主键由数据库生成。
+
+        Args:
+            table: 表名
+            template_where: 选出模板行的条件，模板表别名为t，如"t.id = %s"
+            template_params: 模板行条件的参数
+            rows: 每个新行要覆盖的列值，各dict的键相同
+
+        Returns:
+            int: 插入的行数
+        """
+        if not rows:
+            return 0
+        columns, unique, required = self.table_columns(table)
+        keys = list(rows[0])
+        insert_columns = [column for column in columns if column != "id"]
+        select = []
+        for column in insert_columns:
+            if column in keys:
+                select.append(f"v.`{column}`")
+            elif column in unique:
+                select.append("UUID_SHORT()" if column in required else "NULL")
+            else:
+                select.append(f"t.`{column}`")
+        values = " UNION ALL ".join(
+            "SELECT " + ", ".join(f"%s AS `{key}`" for key in keys) for _ in rows
+        )
+        sql = (
+            f"INSERT INTO `{table}` ({', '.join(f'`{column}`' for column in insert_columns)}) "
+            f"SELECT {', '.join(select)} FROM `{table}` AS t JOIN ({values}) AS v "
+            f"WHERE {template_where}"
+        )
+        params = [row[key] for row in rows for key in keys] + list(template_params)
+        return self.execute_update(sql, params)
+
+    def clone_users(self, template_username, users):
+        """复制模板用户及其用户组，批量创建测试用户，新用户的密码与模板用户相同
+
+        Args:
+            template_username: 模板用户的用户名
+            users: [(用户名, 昵称), ...]
+
+        Returns:
+            dict: 用户名 -> 用户ID
+        """
+        if not users:
+            return {}
+        usernames = [username for username, _ in users]
+        placeholders = ", ".join(["%s"] * len(usernames))
+        self.clone_rows(
+            "users", "t.username = %s", (template_username,),
+            [{"username": username, "nickname": nickname} for username, nickname in users]
+        )
+        self.execute_update(
+            "INSERT INTO group_user (group_id, user_id) "
+            "SELECT g.group_id, u.id FROM group_user AS g "
+            "JOIN users AS t ON g.user_id = t.id "
+            f"JOIN users AS u ON u.username IN ({placeholders}) "
+            "WHERE t.username = %s",
+            (*usernames, template_username)
+        )
+        result = self.execute_query(
+            f"SELECT id, username FROM users WHERE username IN ({placeholders})", usernames
+        )
+        return {row["username"]: row["id"] for row in result}
+
+    def clone_thread(self, thread_id, user_id):
+        """复制帖子及其首帖内容，作者改为user_id
+
+        Returns:
+            int: 新帖子的ID
+        """
+        self.invalidate_ids("threads")
+        # LAST_INSERT_ID只对同一连接有效
+        with self.pool.connection():
+            self.clone_rows("threads", "t.id = %s", (thread_id,), [{"user_id": user_id}])
+            new_thread_id = self.execute_query("SELECT LAST_INSERT_ID() AS id")[0]["id"]
+        self.clone_rows(
+            "posts", "t.thread_id = %s AND t.is_first = 1", (thread_id,),
+            [{"thread_id": new_thread_id, "user_id": user_id}]
+        )
+        return new_thread_id
+
+    def delete_users(self, user_ids):
+        """批量删除用户，以及CLEANUP_TABLES中关联这些用户的私信、帖子、回复、点赞、关注、屏蔽和用户组关系
+
+        按CLEANUP_TABLES的外键依赖顺序逐表删除，各表的条件见USER_DATA_CONDITIONS
+
+        Returns:
+            int: 删除的用户数
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+        self.invalidate_ids()
+        placeholders = ", ".join(["%s"] * len(user_ids))
+        deleted = 0
+        for table in dict.fromkeys(table for table, _, _ in self.CLEANUP_TABLES):
+            condition = self.USER_DATA_CONDITIONS[table]
+            deleted = self.execute_update(
+                f"DELETE FROM `{table}` WHERE {condition.format(ids=placeholders)}",
+                user_ids * condition.count("{ids}")
+            )
+        return deleted
+
+    def record_watermarks(self):
+        """用一条查询记录各数据表当前的最大ID，作为自动清理的水位
+
+        Returns:
+            dict: 表名 -> 最大ID，空表为0
+        """
+        tables = dict.fromkeys(table for _, _, table in self.CLEANUP_TABLES)
+        sql = " UNION ALL ".join(
+            f"SELECT '{table}' AS name, COALESCE(MAX(id), 0) AS id FROM `{table}`" for table in tables
+        )
+        return {row["name"]: row["id"] for row in self.execute_query(sql)}
+
+    def delete_above_watermarks(self, watermarks, batch_size=1000):
+        """删除水位之后新增的数据
+
+        按CLEANUP_TABLES的顺序逐表删除，每批一条DELETE ... LIMIT并立即提交，避免长时间锁表。
+
+        Args:
+            watermarks: record_watermarks的返回值
+            batch_size: 每批删除的最大行数
+
+        Returns:
+            dict: 表名 -> 删除的行数
+        """
+        self.invalidate_ids()
+        deleted = {}
+        for table, column, watermark_table in self.CLEANUP_TABLES:
+            if watermark_table not in watermarks:
+                continue
+            sql = f"DELETE FROM `{table}` WHERE `{column}` > %s ORDER BY `{column}` LIMIT %s"
+            deleted.setdefault(table, 0)
+            while True:
+                rows = self.execute_update(sql, (watermarks[watermark_table], batch_size))
+                deleted[table] += rows
+                if rows < batch_size:
+                    break
+        return deleted
+
 # 创建数据库工具类实例
 db_utils = DatabaseUtils() 
\ No newline at end of file
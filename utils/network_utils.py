@@ -0,0 +1,169 @@
+import re
+import json
+import time
+import weakref
+from selenium.webdriver.remote.command import Command
+from selenium.common.exceptions import TimeoutException
+from utils.webdriver_utils import WebDriverFactory
+
+class NetworkMonitor:
+    """跟踪浏览器中进行中的fetch/XHR请求，用于等待网络空闲
+
+    Chrome开启performance日志时读取其中CDP的Network事件，请求在页面脚本发出之前就能被记录；
+    其他浏览器以及未开启performance日志的Chrome在页面中包装fetch和XMLHttpRequest，记录请求的开始和结束。
+    """
+
+    # CDP中需要跟踪的资源类型
+    RESOURCE_TYPES = ("XHR", "Fetch")
+
+    # 包装fetch和XMLHttpRequest，进行中的请求写入window.__dzqNetwork.pending，可重复执行
+    HOOK_SCRIPT = """
+        (function () {
+            if (window.__dzqNetwork) {
+                return;
+            }
+            const network = window.__dzqNetwork = {pending: {}, events: [], nextId: 0};
+            const start = function (url) {
+                const id = ++network.nextId;
+                network.pending[id] = String(url);
+                network.events.push(String(url));
+                return id;
+            };
+            const finish = function (id) {
+                if (id in network.pending) {
+                    network.events.push(network.pending[id]);
+                    delete network.pending[id];
+                }
+            };
+            const originalFetch = window.fetch;
+            if (originalFetch) {
+                window.fetch = function (input, init) {
+                    const id = start(input && input.url ? input.url : input);
+                    return originalFetch.apply(this, arguments).then(function (response) {
+                        finish(id);
+                        return response;
+                    }, function (error) {
+                        finish(id);
+                        throw error;
+                    });
+                };
+            }
+            const originalOpen = XMLHttpRequest.prototype.open;
+            const originalSend = XMLHttpRequest.prototype.send;
+            XMLHttpRequest.prototype.open = function (method, url) {
+                this.__dzqUrl = url;
+                return originalOpen.apply(this, arguments);
+            };
+            XMLHttpRequest.prototype.send = function () {
+                const id = start(this.__dzqUrl);
+                this.addEventListener('loadend', function () {
+                    finish(id);
+                });
+                return originalSend.apply(this, arguments);
+            };
+        })();
+    """
+    # 读取进行中的请求和上次读取以来的请求事件
+    READ_SCRIPT = """
+        const network = window.__dzqNetwork;
+        if (!network) {
+            return {pending: [], events: []};
+        }
+        return {pending: Object.values(network.pending), events: network.events.splice(0)};
+    """
+
+    # 每个driver对应的监听器
+    _monitors = weakref.WeakKeyDictionary()
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.use_cdp = WebDriverFactory.supports_cdp(driver) and WebDriverFactory.uses_performance_log()
+        # CDP模式下进行中的请求，requestId -> url
+        self._pending = {}
+        if not self.use_cdp:
+            WebDriverFactory.install_init_scripts(driver, [self.HOOK_SCRIPT])
+
+    @classmethod
+    def for_driver(cls, driver):
+        """获取driver对应的监听器，同一driver共享一个实例"""
+        monitor = cls._monitors.get(driver)
+        if monitor is None:
+            monitor = cls._monitors[driver] = cls(driver)
+        return monitor
+
+    @classmethod
+    def discard_events(cls, driver):
+        """丢弃driver已记录的网络事件和进行中的请求
+
+        performance日志只在等待网络空闲时读取，浏览器归还到池中时清空，避免在多个测试之间无限增长
+        """
+        if WebDriverFactory.supports_cdp(driver) and WebDriverFactory.uses_performance_log():
+            driver.execute(Command.GET_LOG, {"type": "performance"})
+        monitor = cls._monitors.get(driver)
+        if monitor is not None:
+            monitor._pending.clear()
+
+    def _read_cdp(self):
+        """读取performance日志中的Network事件，返回(进行中的请求, 新事件的url列表)"""
+        entries = self.driver.execute(Command.GET_LOG, {"type": "performance"})["value"]
+        events = []
+        for entry in entries:
+            message = json.loads(entry["message"])["message"]
+            method = message["method"]
+            params = message.get("params", {})
+            if method == "Network.requestWillBeSent":
+                if params.get("type") in self.RESOURCE_TYPES:
+                    self._pending[params["requestId"]] = params["request"]["url"]
+                    events.append(params["request"]["url"])
+            elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                url = self._pending.pop(params["requestId"], None)
+                if url is not None:
+                    events.append(url)
+            elif method == "Page.frameNavigated" and not params.get("frame", {}).get("parentId"):
+                # 主框架导航后，旧页面的请求不会再有结束事件
+                self._pending.clear()
+        return list(self._pending.values()), events
+
+    def _read_hook(self):
+        """读取页面中fetch/XHR钩子记录的请求，返回(进行中的请求, 新事件的url列表)"""
+        result = self.driver.execute_script(self.READ_SCRIPT)
+        return result["pending"], result["events"]
+
+    def pending(self, url_pattern=None):
+        """返回进行中的请求url列表
+
+        Args:
+            url_pattern: 只返回url匹配该正则表达式的请求，为None时返回所有请求
+        """
+        pending, _ = self._read_cdp() if self.use_cdp else self._read_hook()
+        return [url for url in pending if url_pattern is None or re.search(url_pattern, url)]
+
+    def wait_for_idle(self, url_pattern=None, quiet_ms=500, timeout=10, poll_frequency=0.05):
+        """等待网络空闲，即没有进行中的请求且在quiet_ms毫秒内没有新的请求事件
+
+        Args:
+            url_pattern: 只关注url匹配该正则表达式的请求，为None时关注所有fetch/XHR请求
+            quiet_ms: 判定为空闲所需的静默时间(毫秒)，也用于等待点击后尚未发出的请求
+            timeout: 等待超时时间(秒)
+            poll_frequency: 轮询间隔(秒)
+
+        Returns:
+            float: 从开始等待到网络空闲的耗时(秒)
+
+        Raises:
+            TimeoutException: 超时后仍有请求未完成
+        """
+        start = last_activity = time.monotonic()
+        while True:
+            pending, events = self._read_cdp() if self.use_cdp else self._read_hook()
+            now = time.monotonic()
+            if url_pattern is not None:
+                pending = [url for url in pending if re.search(url_pattern, url)]
+                events = [url for url in events if re.search(url_pattern, url)]
+            if events or pending:
+                last_activity = now
+            elif (now - last_activity) * 1000 >= quiet_ms:
+                return last_activity - start
+            if now - start >= timeout:
+                raise TimeoutException(f"网络请求未在{timeout}秒内完成：{pending}")
+            time.sleep(poll_frequency)
@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import uuid
+import shutil
+import tempfile
+import subprocess
+
+class ProfileTemplate:
+    """预热的浏览器配置模板
+
+    每次测试会话由第一个需要浏览器的进程启动一次浏览器访问关键页面，
+    把论坛的JS、CSS和字体写入模板目录的磁盘缓存。之后每个浏览器使用模板的一份副本，
+    在支持的文件系统上通过reflink写时复制，几乎不占用额外空间和时间。
+    多个xdist worker通过锁文件保证模板只预热一次。
+    """
+
+    ROOT = os.path.join(tempfile.gettempdir(), "forumtest_profiles")
+    # 预热时访问的页面
+    WARM_PAGES = ["", "user/username-login", "thread/post"]
+    # 等待其他进程预热完成的最长时间(秒)，超过后认为预热进程已退出
+    WARM_TIMEOUT = 300
+    # 浏览器运行时创建的锁文件，复制后需要删除，否则新浏览器会认为配置正在被使用
+    LOCK_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie", "lock", ".parentlock", "parent.lock")
+    READY_FILE = ".warmed"
+
+    def __init__(self, browser_name, base_url="https://localhost", pages=None):
+        """初始化配置模板
+
+        Args:
+            browser_name: 浏览器名称，不同浏览器使用不同的模板目录
+            base_url: 论坛地址
+            pages: 预热时访问的页面路径列表，默认为WARM_PAGES
+        """
+        self.browser_name = browser_name.lower()
+        self.urls = [f"{base_url}/{page}" for page in (self.WARM_PAGES if pages is None else pages)]
+        self.template_dir = os.path.join(self.ROOT, self.browser_name, "template")
+        self.clone_root = os.path.join(self.ROOT, self.browser_name, "clones")
+        self._lock_file = os.path.join(self.ROOT, self.browser_name, "template.lock")
+
+    def reset(self):
+        """删除上次会话的模板和残留副本，下次使用时重新预热"""
+        shutil.rmtree(os.path.join(self.ROOT, self.browser_name), ignore_errors=True)
+
+    def is_ready(self):
+        """判断模板是否已预热完成"""
+        return os.path.exists(os.path.join(self.template_dir, self.READY_FILE))
+
+    def ensure(self, warm):
+        """确保模板已预热，同一时间只有一个进程执行预热
+
+        Args:
+            warm: 预热函数，参数为模板目录和需要访问的页面URL列表
+        """
+        os.makedirs(os.path.dirname(self._lock_file), exist_ok=True)
+        deadline = time.monotonic() + self.WARM_TIMEOUT
+        while not self.is_ready():
+            try:
+                fd = os.open(self._lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if time.monotonic() > deadline:
+                    # 预热进程异常退出，锁文件残留
+                    self._remove(self._lock_file)
+                    deadline = time.monotonic() + self.WARM_TIMEOUT
+                time.sleep(0.5)
+                continue
+
+            os.close(fd)
+            try:
+                if not self.is_ready():
+                    shutil.rmtree(self.template_dir, ignore_errors=True)
+                    os.makedirs(self.template_dir)
+                    warm(self.template_dir, self.urls)
+                    self._remove_lock_files(self.template_dir)
+                    open(os.path.join(self.template_dir, self.READY_FILE), "w").close()
+            finally:
+                self._remove(self._lock_file)
+
+    def clone(self, warm):
+        """复制一份预热好的模板，返回副本目录
+
+        Args:
+            warm: 模板尚未预热时使用的预热函数
+        """
+        self.ensure(warm)
+        os.makedirs(self.clone_root, exist_ok=True)
+        target = os.path.join(self.clone_root, uuid.uuid4().hex)
+        if sys.platform.startswith("linux") and shutil.which("cp"):
+            # GNU cp在支持reflink的文件系统(btrfs、xfs等)上写时复制，不支持时退化为普通复制
+            subprocess.run(["cp", "-a", "--reflink=auto", self.template_dir, target], check=True)
+        else:
+            shutil.copytree(self.template_dir, target, symlinks=True,
+                            ignore=shutil.ignore_patterns(*self.LOCK_FILES))
+        self._remove_lock_files(target)
+        return target
+
+    def _remove_lock_files(self, directory):
+        """删除配置目录中浏览器残留的锁文件"""
+        for root, dirs, files in os.walk(directory):
+            for name in dirs + files:
+                if name in self.LOCK_FILES:
+                    self._remove(os.path.join(root, name))
+
+    @staticmethod
+    def _remove(path):
+        """删除文件或符号链接，不存在时忽略"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def discard(profile_dir):
+        """删除不再使用的配置副本"""
+        shutil.rmtree(profile_dir, ignore_errors=True)
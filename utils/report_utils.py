@@ -0,0 +1,15 @@
+import allure
+
+def attach_latency(name, seconds, timeout_text="超时未观察到状态变化"):
+    """把耗时以文本附件的形式添加到Allure报告
+
+    Args:
+        name: 附件名称
+        seconds: 耗时(秒)，为None时表示等待超时
+        timeout_text: 超时时附件的内容
+    """
+    allure.attach(
+        f"{seconds:.3f}秒" if seconds is not None else timeout_text,
+        name=name,
+        attachment_type=allure.attachment_type.TEXT
+    )
@@ -0,0 +1,198 @@
+import os
+import time
+import sqlite3
+import statistics
+from xdist.scheduler import LoadScopeScheduling
+
+class DurationStore:
+    """测试耗时历史，保存在SQLite中
+
+    每个测试记录setup、call、teardown三个阶段的总耗时，与历史值做加权平均，
+    避免一次偶然的慢速运行大幅改变调度结果。
+    """
+
+    # 新耗时在加权平均中的权重
+    SMOOTHING = 0.5
+
+    def __init__(self, path):
+        """初始化耗时存储
+
+        Args:
+            path: SQLite数据库文件路径，不存在时自动创建
+        """
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS durations ("
+                "nodeid TEXT PRIMARY KEY, duration REAL NOT NULL, runs INTEGER NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        """打开数据库连接，多个进程同时写入时等待锁释放"""
+        return sqlite3.connect(self.path, timeout=30)
+
+    def load(self):
+        """读取所有测试的历史耗时
+
+        Returns:
+            dict: nodeid -> 耗时(秒)
+        """
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT nodeid, duration FROM durations"))
+
+    def record(self, durations):
+        """批量记录本次运行的测试耗时
+
+        Args:
+            durations: nodeid -> 本次耗时(秒)
+        """
+        if not durations:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                existing = dict(conn.execute("SELECT nodeid, duration FROM durations"))
+                rows = []
+                for nodeid, duration in durations.items():
+                    if nodeid in existing:
+                        duration = existing[nodeid] * (1 - self.SMOOTHING) + duration * self.SMOOTHING
+                    rows.append((nodeid, duration, now))
+                conn.executemany(
+                    "INSERT INTO durations (nodeid, duration, runs, updated) VALUES (?, ?, 1, ?) "
+                    "ON CONFLICT(nodeid) DO UPDATE SET duration = excluded.duration, "
+                    "runs = runs + 1, updated = excluded.updated",
+                    rows
+                )
+        finally:
+            conn.close()
+
+def strip_group(nodeid):
+    """去掉loadgroup调度时xdist追加在nodeid后的"@组名"，参数化的值中可能包含@，需排除"""
+    if nodeid.rfind("@") > nodeid.rfind("]"):
+        return nodeid.rsplit("@", 1)[0]
+    return nodeid
+
+def resource_groups(resources):
+    """按声明的资源把测试分组，直接或间接使用同一资源的测试属于同一组
+
+    Args:
+        resources: nodeid -> 测试使用的资源名集合
+
+    Returns:
+        dict: nodeid -> 组名，未声明资源的测试不在结果中
+    """
+    parent = {}
+
+    def find(name):
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    for names in resources.values():
+        names = sorted(names)
+        for name in names:
+            parent.setdefault(name, name)
+        for name in names[1:]:
+            parent[find(name)] = find(names[0])
+
+    members = {}
+    for name in parent:
+        members.setdefault(find(name), []).append(name)
+    # 组名会追加到nodeid后，不能包含"@"和"]"
+    group_names = {root: "resource_" + "+".join(sorted(names)) for root, names in members.items()}
+
+    return {
+        nodeid: group_names[find(next(iter(names)))]
+        for nodeid, names in resources.items()
+        if names
+    }
+
+def duration_db_path(config):
+    """耗时数据库的路径，位于.pytest_cache下"""
+    if getattr(config, "cache", None) is not None:
+        return os.path.join(config.cache.mkdir("forumtest"), "durations.sqlite")
+    return os.path.join(str(config.rootpath), ".pytest_cache", "forumtest_durations.sqlite")
+
+class DurationRecorder:
+    """记录测试耗时的pytest插件，只在主进程中注册，xdist的测试报告会汇总到主进程"""
+
+    def __init__(self, store):
+        self.store = store
+        self.durations = {}
+        self.skipped = set()
+
+    def pytest_runtest_logreport(self, report):
+        """累计每个测试各阶段的耗时，被跳过的测试不记录"""
+        nodeid = strip_group(report.nodeid)
+        if report.skipped:
+            self.skipped.add(nodeid)
+        self.durations[nodeid] = self.durations.get(nodeid, 0.0) + report.duration
+
+    def pytest_sessionfinish(self, session):
+        """测试结束后写入耗时数据库"""
+        self.store.record({
+            nodeid: duration for nodeid, duration in self.durations.items()
+            if nodeid not in self.skipped
+        })
+
+class DurationScheduling(LoadScopeScheduling):
+    """按历史耗时分配测试的xdist调度器
+
+    每个测试是一个独立的工作单元，worker空闲时分配剩余工作中预计耗时最长的单元
+    (最长处理时间优先)，耗时长的测试尽早开始，避免最后只剩一个worker在运行慢测试。
+    没有历史记录的测试按已知耗时的中位数估算。
+    带有xdist_group组名的测试(nodeid以"@组名"结尾)合并为一个工作单元，在同一worker中依次执行，
+    单元的耗时为组内测试耗时之和。
+    """
+
+    # 没有任何历史记录时每个测试的估计耗时(秒)
+    DEFAULT_DURATION = 1.0
+
+    def __init__(self, config, log=None, durations=None):
+        """初始化调度器
+
+        Args:
+            config: pytest配置对象
+            log: xdist的日志对象
+            durations: nodeid -> 历史耗时(秒)
+        """
+        super().__init__(config, log)
+        self.durations = durations or {}
+        self.default_duration = (
+            statistics.median(self.durations.values()) if self.durations else self.DEFAULT_DURATION
+        )
+
+    def _split_scope(self, nodeid):
+        """同组的测试属于同一个工作单元，其余每个测试单独作为一个工作单元"""
+        if nodeid.rfind("@") > nodeid.rfind("]"):
+            return nodeid.rsplit("@", 1)[1]
+        return nodeid
+
+    def unit_weight(self, work_unit):
+        """工作单元中未完成测试的预计总耗时"""
+        return sum(
+            self.durations.get(strip_group(nodeid), self.default_duration)
+            for nodeid, completed in work_unit.items()
+            if not completed
+        )
+
+    def _assign_work_unit(self, node):
+        """把预计耗时最长的工作单元分配给node"""
+        assert self.workqueue
+
+        scope = max(self.workqueue, key=lambda key: self.unit_weight(self.workqueue[key]))
+        work_unit = self.workqueue.pop(scope)
+
+        assigned_to_node = self.assigned_work.setdefault(node, {})
+        assigned_to_node[scope] = work_unit
+
+        worker_collection = self.registered_collections[node]
+        nodeids_indexes = [
+            worker_collection.index(nodeid)
+            for nodeid, completed in work_unit.items()
+            if not completed
+        ]
+        node.send_runtest_some(nodeids_indexes)
@@ -0,0 +1,127 @@
+import io
+import os
+import re
+import time
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    # Pillow为可选依赖，未安装时只保存原始PNG
+    Image = None
+
+class ScreenshotService:
+    """截图服务，按策略决定是否截图，并在后台线程中完成编码和写盘
+
+    截图本身需要在测试线程中通过WebDriver获取，缩放、格式转换和写文件交给线程池处理。
+    文件按xdist worker分目录保存，避免多个worker互相覆盖。
+    """
+
+    POLICIES = ("never", "on-failure", "always")
+    FORMATS = ("png", "jpeg", "webp")
+
+    def __init__(self, policy="on-failure", output_dir="screenshots", image_format="png",
+                 scale=1.0, quality=80, max_workers=2):
+        """初始化截图服务
+
+        Args:
+            policy: 截图策略，never(从不)、on-failure(仅测试失败时)、always(所有截图点)
+            output_dir: 截图保存目录
+            image_format: 保存格式，png、jpeg或webp，非png格式需要安装Pillow
+            scale: 缩放比例，小于1时缩小截图，需要安装Pillow
+            quality: jpeg/webp的压缩质量
+            max_workers: 后台编码、写盘的线程数
+        """
+        self.policy = policy
+        self.output_dir = output_dir
+        self.image_format = image_format
+        self.scale = scale
+        self.quality = quality
+        self.max_workers = max_workers
+        self.worker_id = os.environ.get("PYTEST_XDIST_WORKER", "main")
+        self._executor = None
+        self._futures = []
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def configure(self, **kwargs):
+        """更新截图配置"""
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+        return self
+
+    def should_capture(self, on_failure=False):
+        """根据策略判断是否需要截图
+
+        Args:
+            on_failure: 是否为测试失败时的截图，其余截图点仅在always策略下截图
+        """
+        if self.policy == "always":
+            return True
+        if self.policy == "on-failure":
+            return on_failure
+        return False
+
+    def capture(self, driver, name, on_failure=False):
+        """截图并在后台保存
+
+        Returns:
+            bytes: 截图的PNG原始数据，可直接附加到Allure报告；未截图时返回None
+        """
+        if not self.should_capture(on_failure):
+            return None
+        png = driver.get_screenshot_as_png()
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="screenshot"
+                )
+            # 丢弃已成功完成的任务，失败的任务保留到flush时抛出异常
+            self._futures = [f for f in self._futures if not f.done() or f.exception() is not None]
+            self._futures.append(self._executor.submit(self._save, png, name, next(self._counter)))
+        return png
+
+    def _save(self, png, name, index):
+        """编码并写入截图文件，在后台线程中执行"""
+        directory = os.path.join(self.output_dir, self.worker_id)
+        os.makedirs(directory, exist_ok=True)
+        safe_name = re.sub(r'[\\/:*?"<>|\s\[\]]+', "_", name)
+        image_format = self.image_format
+        data = png
+
+        if Image is not None and (image_format != "png" or self.scale != 1.0):
+            image = Image.open(io.BytesIO(png))
+            if self.scale != 1.0:
+                size = (max(1, int(image.width * self.scale)), max(1, int(image.height * self.scale)))
+                image = image.resize(size)
+            if image_format == "jpeg":
+                image = image.convert("RGB")
+            buffer = io.BytesIO()
+            image.save(buffer, format=image_format.upper(), quality=self.quality)
+            data = buffer.getvalue()
+        else:
+            image_format = "png"
+
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}_{index:04d}_{safe_name}.{image_format}")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def flush(self):
+        """等待所有后台截图写入完成，返回写入的文件路径"""
+        with self._lock:
+            futures, self._futures = self._futures, []
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        """写完剩余截图并关闭线程池"""
+        self.flush()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+# 创建截图服务实例
+screenshot_service = ScreenshotService()
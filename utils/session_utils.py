@@ -0,0 +1,86 @@
+import time
+
+class LoginSessionCache:
+    """登录会话缓存，每个worker进程只通过UI登录一次
+
+    首次登录后记录cookies和localStorage中的令牌，之后在每个新建或重置后的浏览器
+    首次导航前注入这些状态。定期校验登录状态，令牌过期时才重新登录。
+    """
+
+    # 注入登录状态前打开的同源轻量页面，cookies和localStorage只能写入当前页面所在的源；
+    # 该地址不能被浏览器配置的blocked_urls屏蔽，否则会停留在错误页上
+    INJECT_PATH = "favicon.ico"
+
+    READ_STORAGE_SCRIPT = """
+        const items = {};
+        for (let i = 0; i < window.localStorage.length; i++) {
+            const key = window.localStorage.key(i);
+            items[key] = window.localStorage.getItem(key);
+        }
+        return items;
+    """
+    WRITE_STORAGE_SCRIPT = """
+        const items = arguments[0];
+        for (const key in items) {
+            window.localStorage.setItem(key, items[key]);
+        }
+    """
+
+    def __init__(self, login, is_logged_in, base_url="https://localhost", check_interval=300):
+        """初始化登录会话缓存
+
+        Args:
+            login: 通过UI完成登录的函数，参数为driver
+            is_logged_in: 校验当前浏览器是否处于登录状态的函数，参数为driver
+            base_url: 论坛地址
+            check_interval: 登录状态校验间隔(秒)
+        """
+        self.login = login
+        self.is_logged_in = is_logged_in
+        self.base_url = base_url
+        self.check_interval = check_interval
+        self.cookies = None
+        self.local_storage = None
+        self.last_checked = None
+
+    def capture(self, driver):
+        """记录当前浏览器的cookies和localStorage"""
+        self.cookies = driver.get_cookies()
+        self.local_storage = driver.execute_script(self.READ_STORAGE_SCRIPT)
+        self.last_checked = time.time()
+
+    def inject(self, driver):
+        """将缓存的登录状态写入浏览器"""
+        driver.get(f"{self.base_url}/{self.INJECT_PATH}")
+        for cookie in self.cookies:
+            # localhost下携带domain字段写入cookie会被浏览器拒绝
+            cookie = {key: value for key, value in cookie.items() if key != "domain"}
+            driver.add_cookie(cookie)
+        driver.execute_script(self.WRITE_STORAGE_SCRIPT, self.local_storage)
+
+    def is_expired(self):
+        """判断缓存的cookies是否已过期"""
+        now = time.time()
+        return any(cookie.get("expiry", now + 1) <= now for cookie in self.cookies)
+
+    def relogin(self, driver):
+        """清除浏览器中的登录状态后重新通过UI登录"""
+        driver.delete_all_cookies()
+        driver.execute_script("window.localStorage.clear();")
+        self.login(driver)
+        self.capture(driver)
+
+    def apply(self, driver):
+        """为浏览器应用登录状态，必要时重新登录"""
+        if self.cookies is None or self.is_expired():
+            self.login(driver)
+            self.capture(driver)
+            return
+
+        self.inject(driver)
+
+        if time.time() - self.last_checked >= self.check_interval:
+            if self.is_logged_in(driver):
+                self.last_checked = time.time()
+            else:
+                self.relogin(driver)
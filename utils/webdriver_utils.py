@@ -1,18 +1,267 @@
 from selenium import webdriver
+from selenium.common.exceptions import SessionNotCreatedException, WebDriverException
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+from selenium.webdriver.firefox.remote_connection import FirefoxRemoteConnection
 from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.firefox.service import Service as FirefoxService
 from webdriver_manager.chrome import ChromeDriverManager
 from webdriver_manager.firefox import GeckoDriverManager
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from selenium.webdriver.support.ui import WebDriverWait
+from urllib3.exceptions import HTTPError
+from utils.profile_utils import ProfileTemplate
 import os
+import json
+import time
+import shutil
+import atexit
+import tempfile
+import threading
+import weakref
+
+class DriverBinaryResolver:
+    """驱动程序路径解析器，缓存webdriver_manager的解析结果
+
+    解析顺序：进程内缓存 -> 环境变量 -> 本地清单文件 -> webdriver_manager下载。
+    离线模式下不会访问网络，只使用环境变量、清单文件和PATH中的驱动程序。
+    """
+
+    MANIFEST_FILE = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".driver_manifest.json"
+    )
+    # 在线模式下清单记录的有效期，过期后重新通过webdriver_manager检查版本
+    MANIFEST_TTL = 24 * 60 * 60
+
+    DRIVERS = {
+        "chrome": {"env": "CHROMEDRIVER_PATH", "binary": "chromedriver", "manager": ChromeDriverManager},
+        "firefox": {"env": "GECKODRIVER_PATH", "binary": "geckodriver", "manager": GeckoDriverManager},
+    }
+
+    offline = os.environ.get("WDM_OFFLINE", "").lower() in ("1", "true", "yes")
+    _resolved = {}
+
+    @classmethod
+    def resolve(cls, browser_name):
+        """返回指定浏览器的驱动程序路径，同一进程内只解析一次"""
+        if browser_name in cls._resolved:
+            return cls._resolved[browser_name]
+
+        driver = cls.DRIVERS[browser_name]
+        path = os.environ.get(driver["env"]) or cls._load_manifest_entry(browser_name)
+        if path is None:
+            if cls.offline:
+                path = shutil.which(driver["binary"])
+                if path is None:
+                    raise FileNotFoundError(
+                        f"离线模式下找不到{driver['binary']}，请设置{driver['env']}或将其加入PATH"
+                    )
+            else:
+                path = driver["manager"]().install()
+            cls._save_manifest_entry(browser_name, path)
+
+        cls._resolved[browser_name] = path
+        return path
+
+    @classmethod
+    def _load_manifest(cls):
+        """读取本地清单文件"""
+        try:
+            with open(cls.MANIFEST_FILE, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def _load_manifest_entry(cls, browser_name):
+        """从清单文件中读取仍然有效的驱动程序路径"""
+        entry = cls._load_manifest().get(browser_name)
+        if not entry or not os.path.isfile(entry["path"]):
+            return None
+        if not cls.offline and time.time() - entry["resolved_at"] > cls.MANIFEST_TTL:
+            return None
+        return entry["path"]
+
+    @classmethod
+    def _save_manifest_entry(cls, browser_name, path):
+        """写入清单文件，先写临时文件再替换，避免多个worker同时写入时损坏"""
+        manifest = cls._load_manifest()
+        manifest[browser_name] = {"path": path, "resolved_at": time.time()}
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cls.MANIFEST_FILE), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, cls.MANIFEST_FILE)
+
+class DriverServiceManager:
+    """驱动服务管理器，每个worker进程内每种浏览器只启动一个驱动服务
+
+    chromedriver/geckodriver进程在首次创建会话时启动并保持运行，之后的会话都连接到该服务。
+    每次创建会话前检查服务进程是否存活、端口是否可连接，异常时自动重启。
+    """
+
+    SERVICES = {
+        "chrome": Service,
+        "firefox": FirefoxService,
+    }
+
+    _services = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_service_url(cls, browser_name):
+        """返回可用驱动服务的地址，服务不存在或不健康时(重新)启动"""
+        with cls._lock:
+            service = cls._services.get(browser_name)
+            if service is not None and not cls.is_healthy(service):
+                service.stop()
+                service = None
+            if service is None:
+                service = cls.SERVICES[browser_name](DriverBinaryResolver.resolve(browser_name))
+                service.start()
+                if not cls._services:
+                    atexit.register(cls.stop_all)
+                cls._services[browser_name] = service
+            return service.service_url
+
+    @staticmethod
+    def is_healthy(service):
+        """判断驱动服务进程是否存活且端口可连接"""
+        return (
+            service.process is not None
+            and service.process.poll() is None
+            and service.is_connectable()
+        )
+
+    @classmethod
+    def restart(cls, browser_name):
+        """停止驱动服务，下次创建会话时重新启动"""
+        with cls._lock:
+            service = cls._services.pop(browser_name, None)
+        if service is not None:
+            service.stop()
+
+    @classmethod
+    def stop_all(cls):
+        """停止所有驱动服务"""
+        with cls._lock:
+            services, cls._services = list(cls._services.values()), {}
+        for service in services:
+            service.stop()
+
+class AttachedRemote(webdriver.Remote):
+    """连接到已有会话的Remote WebDriver，初始化时不创建新会话"""
+
+    def __init__(self, command_executor, session_id, capabilities, options):
+        self._attach_session = (session_id, capabilities)
+        super().__init__(command_executor=command_executor, options=options)
+
+    def start_session(self, capabilities):
+        """使用已有会话的ID和能力，替代创建新会话的请求"""
+        self.session_id, self.caps = self._attach_session
 
 class WebDriverFactory:
     """WebDriver工厂类，用于创建和管理WebDriver实例"""
+
+    # 每个driver已注册的页面初始化脚本，以及CDP返回的脚本标识
+    _init_scripts = weakref.WeakKeyDictionary()
+    _init_script_ids = weakref.WeakKeyDictionary()
+
+    # 浏览器配置：fast屏蔽图片、字体和统计脚本并关闭过渡动画，用于功能测试；
+    # realistic保持浏览器默认行为，用于性能测试
+    PROFILES = {
+        "realistic": {
+            "blocked_urls": [],
+            "disable_animations": False,
+            "firefox_prefs": {},
+        },
+        "fast": {
+            "blocked_urls": [
+                "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp",
+                "*.woff", "*.woff2", "*.ttf", "*.otf",
+                "*hm.baidu.com*", "*google-analytics.com*", "*googletagmanager.com*",
+            ],
+            "disable_animations": True,
+            # Firefox不支持CDP，无法按URL模式屏蔽，通过首选项不加载图片和网页字体，并减少动画
+            "firefox_prefs": {
+                "permissions.default.image": 2,
+                "browser.display.use_document_fonts": 0,
+                "ui.prefersReducedMotion": 1,
+                "toolkit.cosmeticAnimations.enabled": False,
+            },
+        },
+    }
+    # 当前使用的配置和额外屏蔽的URL模式，由pytest_configure根据命令行选项设置
+    profile = "realistic"
+    extra_blocked_urls = []
+    # 页面加载策略：normal等待load事件，eager等待DOMContentLoaded，none不等待，
+    # 非normal策略下由BasePage.open等待前端应用就绪
+    page_load_strategy = "normal"
+    # 等待网络空闲的方式：cdp通过Chrome的performance日志读取Network事件，hook在页面中包装fetch/XHR；
+    # auto在realistic配置下使用hook，性能测试不开启performance日志
+    network_monitor = "auto"
+    # 预热的浏览器配置模板，为None时每个浏览器使用全新的临时配置
+    profile_template = None
+    # 每个driver使用的配置副本目录，关闭浏览器后删除
+    _profile_dirs = weakref.WeakKeyDictionary()
+    # 固定使用的驱动服务地址，为None时连接当前worker共享的驱动服务
+    remote_url = None
+
+    # 关闭页面中所有过渡和动画的样式，动画时长设为0而不是移除动画，animationend等事件仍会触发。
+    # 通过CDP注入时脚本在<html>创建之前执行，需等根元素插入后再添加样式
+    DISABLE_ANIMATIONS_SCRIPT = """
+        (function () {
+            if (document.getElementById('dzq-disable-animations')) {
+                return;
+            }
+            const style = document.createElement('style');
+            style.id = 'dzq-disable-animations';
+            style.textContent = '*, *::before, *::after {' +
+                'transition-duration: 0s !important;' +
+                'transition-delay: 0s !important;' +
+                'animation-duration: 0s !important;' +
+                'animation-delay: 0s !important;' +
+                'scroll-behavior: auto !important;' +
+            '}';
+            const append = function () {
+                (document.head || document.documentElement).appendChild(style);
+            };
+            if (document.documentElement) {
+                append();
+                return;
+            }
+            new MutationObserver(function (mutations, observer) {
+                if (document.documentElement) {
+                    observer.disconnect();
+                    append();
+                }
+            }).observe(document, { childList: true });
+        })();
+    """
+
+    @classmethod
+    def uses_performance_log(cls):
+        """是否开启Chrome的performance日志，只有通过CDP事件等待网络空闲时才需要"""
+        if cls.network_monitor == "auto":
+            return cls.profile != "realistic"
+        return cls.network_monitor == "cdp"
+
+    @classmethod
+    def get_profile(cls):
+        """返回当前浏览器配置，屏蔽的URL模式包含命令行追加的模式"""
+        profile = dict(cls.PROFILES[cls.profile])
+        profile["blocked_urls"] = profile["blocked_urls"] + list(cls.extra_blocked_urls)
+        return profile
     
     @staticmethod
-    def create_chrome_driver(headless=False):
-        """创建Chrome WebDriver"""
+    def create_chrome_driver(headless=False, profile_dir=None):
+        """创建Chrome WebDriver
+
+        Args:
+            headless: 是否使用无头模式
+            profile_dir: 浏览器配置目录(user-data-dir)，为None时使用临时配置
+        """
         options = ChromeOptions()
+        options.page_load_strategy = WebDriverFactory.page_load_strategy
         
         if headless:
             options.add_argument("--headless")
@@ -26,54 +275,235 @@ class WebDriverFactory:
         options.add_argument('--ignore-certificate-errors')
         options.add_argument('--ignore-ssl-errors')
         options.add_argument('--allow-insecure-localhost')
+        if profile_dir:
+            options.add_argument(f"--user-data-dir={profile_dir}")
         options.add_experimental_option('excludeSwitches', ['enable-logging'])
 
         # 关闭密码泄露提示
         options.add_experimental_option("prefs", {"profile.password_manager_leak_detection": False})
 
-        # 使用webdriver_manager自动下载和管理ChromeDriver
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+        # 开启performance日志，NetworkMonitor通过其中的CDP Network事件判断网络是否空闲
+        if WebDriverFactory.uses_performance_log():
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+        profile = WebDriverFactory.get_profile()
+        if profile["disable_animations"]:
+            options.add_argument("--force-prefers-reduced-motion")
+
+        # 连接到当前worker共享的ChromeDriver服务
+        driver = WebDriverFactory._create_session("chrome", options)
+
+        WebDriverFactory.apply_cdp_profile(driver)
         
-        # 设置隐式等待时间
-        driver.implicitly_wait(10)
+        # 关闭隐式等待，由BasePage的显式等待负责，避免两种等待叠加
+        driver.implicitly_wait(0)
         
         return driver
     
     @staticmethod
-    def create_firefox_driver(headless=False):
-        """创建Firefox WebDriver"""
+    def create_firefox_driver(headless=False, profile_dir=None):
+        """创建Firefox WebDriver
+
+        Args:
+            headless: 是否使用无头模式
+            profile_dir: 浏览器配置目录，为None时由geckodriver创建临时配置
+        """
         options = FirefoxOptions()
+        options.page_load_strategy = WebDriverFactory.page_load_strategy
         
         if headless:
             options.add_argument("--headless")
         
         options.add_argument("--width=1920")
         options.add_argument("--height=1080")
+        if profile_dir:
+            options.add_argument("-profile")
+            options.add_argument(profile_dir)
+
+        profile = WebDriverFactory.get_profile()
+        for name, value in profile["firefox_prefs"].items():
+            options.set_preference(name, value)
         
-        # 使用webdriver_manager自动下载和管理GeckoDriver
-        service = Service(GeckoDriverManager().install())
-        driver = webdriver.Firefox(service=service, options=options)
+        # 连接到当前worker共享的GeckoDriver服务
+        try:
+            driver = WebDriverFactory._create_session("firefox", options)
+        except SessionNotCreatedException:
+            # geckodriver同一时间只支持一个会话，已有会话占用时单独启动服务
+            service = FirefoxService(DriverBinaryResolver.resolve("firefox"))
+            driver = webdriver.Firefox(service=service, options=options)
         
-        # 设置隐式等待时间
-        driver.implicitly_wait(10)
+        # 关闭隐式等待，由BasePage的显式等待负责，避免两种等待叠加
+        driver.implicitly_wait(0)
+
+        if profile["disable_animations"]:
+            WebDriverFactory.install_init_scripts(driver, [WebDriverFactory.DISABLE_ANIMATIONS_SCRIPT])
         
         return driver
     
+    @staticmethod
+    def _create_executor(browser_name, service_url, ignore_proxy=False):
+        """创建连接到驱动服务的命令执行器，Chrome的执行器支持CDP命令"""
+        if browser_name == "chrome":
+            return ChromiumRemoteConnection(
+                remote_server_addr=service_url,
+                vendor_prefix="goog",
+                browser_name="chrome",
+                ignore_proxy=ignore_proxy
+            )
+        return FirefoxRemoteConnection(
+            remote_server_addr=service_url,
+            ignore_proxy=ignore_proxy
+        )
+
+    @staticmethod
+    def _create_session(browser_name, options):
+        """在共享的驱动服务上创建新的浏览器会话，服务无响应时重启后重试一次"""
+        if WebDriverFactory.remote_url:
+            executor = WebDriverFactory._create_executor(
+                browser_name, WebDriverFactory.remote_url, options._ignore_local_proxy
+            )
+            return webdriver.Remote(command_executor=executor, options=options)
+
+        for attempt in range(2):
+            service_url = DriverServiceManager.get_service_url(browser_name)
+            executor = WebDriverFactory._create_executor(
+                browser_name, service_url, options._ignore_local_proxy
+            )
+            try:
+                return webdriver.Remote(command_executor=executor, options=options)
+            except SessionNotCreatedException:
+                raise
+            except (WebDriverException, HTTPError, OSError):
+                if attempt:
+                    raise
+                DriverServiceManager.restart(browser_name)
+
     @classmethod
-    def create_driver(cls, browser_name="chrome", headless=False):
-        """根据浏览器名称创建WebDriver"""
+    def create_driver(cls, browser_name="chrome", headless=False, profile_dir=None):
+        """根据浏览器名称创建WebDriver
+
+        Args:
+            browser_name: 浏览器名称
+            headless: 是否使用无头模式
+            profile_dir: 浏览器配置目录，为None且设置了profile_template时使用预热模板的副本
+        """
         browser_name = browser_name.lower()
-        
-        if browser_name == "chrome":
-            return cls.create_chrome_driver(headless)
-        elif browser_name == "firefox":
-            return cls.create_firefox_driver(headless)
-        else:
+        if browser_name not in ("chrome", "firefox"):
             raise ValueError(f"不支持的浏览器类型: {browser_name}")
+
+        clone = None
+        if profile_dir is None and cls.profile_template is not None:
+            profile_dir = clone = cls.profile_template.clone(
+                lambda template_dir, urls: cls._warm_profile(browser_name, headless, template_dir, urls)
+            )
+
+        try:
+            if browser_name == "chrome":
+                driver = cls.create_chrome_driver(headless, profile_dir)
+            else:
+                driver = cls.create_firefox_driver(headless, profile_dir)
+        except Exception:
+            if clone:
+                ProfileTemplate.discard(clone)
+            raise
+
+        if clone:
+            cls._profile_dirs[driver] = clone
+        return driver
+
+    @classmethod
+    def _warm_profile(cls, browser_name, headless, profile_dir, urls):
+        """使用模板目录启动浏览器依次访问页面，等待资源加载完成后退出，缓存随之写入磁盘"""
+        driver = cls.create_driver(browser_name, headless, profile_dir=profile_dir)
+        try:
+            for url in urls:
+                driver.get(url)
+                WebDriverWait(driver, 30).until(
+                    lambda d: d.execute_script("return document.readyState") == "complete"
+                )
+        finally:
+            driver.quit()
     
+    @classmethod
+    def attach_session(cls, browser_name, service_url, session_id, capabilities):
+        """连接到已存在的浏览器会话，不创建新会话"""
+        options = ChromeOptions() if browser_name == "chrome" else FirefoxOptions()
+        executor = cls._create_executor(browser_name, service_url)
+        return AttachedRemote(executor, session_id, capabilities, options)
+
+    @staticmethod
+    def supports_cdp(driver):
+        """判断driver是否支持Chrome DevTools Protocol命令"""
+        return (driver.caps or {}).get("browserName") == "chrome"
+
+    @classmethod
+    def apply_cdp_profile(cls, driver):
+        """通过CDP为driver当前的标签页应用浏览器配置：屏蔽配置中的URL模式，注入关闭动画的样式
+
+        CDP命令只作用于执行时所在的标签页，新建的浏览器上下文需要重新应用
+        """
+        profile = cls.get_profile()
+        if profile["blocked_urls"]:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": profile["blocked_urls"]})
+        if profile["disable_animations"]:
+            cls.install_init_scripts(driver, [cls.DISABLE_ANIMATIONS_SCRIPT])
+
+    @classmethod
+    def installed_init_scripts(cls, driver):
+        """返回driver已注册的页面初始化脚本"""
+        return list(cls._init_scripts.get(driver, []))
+
+    @classmethod
+    def install_init_scripts(cls, driver, scripts):
+        """注册在每次页面加载时执行的脚本，同一脚本对同一driver只注册一次
+
+        Chrome通过CDP在页面自身脚本执行之前注入；其他浏览器记录下来，
+        由run_init_scripts在每次导航完成后执行，因此脚本需要能重复执行。
+        """
+        installed = cls._init_scripts.setdefault(driver, [])
+        for script in scripts:
+            if script in installed:
+                continue
+            if cls.supports_cdp(driver):
+                result = driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": script})
+                cls._init_script_ids.setdefault(driver, []).append(result["identifier"])
+            installed.append(script)
+
+    @classmethod
+    def init_script_ids(cls, driver):
+        """返回通过CDP注册的页面初始化脚本的标识"""
+        return list(cls._init_script_ids.get(driver, []))
+
+    @classmethod
+    def remove_init_scripts(cls, driver, identifiers):
+        """按标识移除通过CDP注册的页面初始化脚本，已不存在的标识忽略
+
+        连接到已有浏览器会话时，用于移除之前的进程注册的脚本，避免同一脚本每次导航重复执行
+        """
+        if not cls.supports_cdp(driver):
+            return
+        for identifier in identifiers:
+            try:
+                driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": identifier})
+            except WebDriverException:
+                pass
+
+    @classmethod
+    def run_init_scripts(cls, driver):
+        """在不支持CDP的浏览器中，导航完成后执行已注册的脚本"""
+        if cls.supports_cdp(driver):
+            return
+        for script in cls._init_scripts.get(driver, []):
+            driver.execute_script(script)
+
     @staticmethod
     def quit_driver(driver):
-        """关闭WebDriver"""
+        """关闭WebDriver，并删除其使用的配置副本"""
         if driver:
-            driver.quit() 
\ No newline at end of file
+            profile_dir = WebDriverFactory._profile_dirs.pop(driver, None)
+            try:
+                driver.quit()
+            finally:
+                if profile_dir:
+                    ProfileTemplate.discard(profile_dir) 
\ No newline at end of file